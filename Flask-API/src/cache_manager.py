@@ -9,7 +9,7 @@ from datetime import datetime
 # Thêm RagON vào path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
 
-from minirag.vectorstore import build_or_load_vectorstore
+from minirag.vectorstore import build_or_load_vectorstore, clear_store_cache
 
 # In-memory cache: {pdf_dir: {index: FAISS, loaded_at: datetime}}
 INDEX_CACHE: Dict[str, Dict[str, any]] = {}
@@ -75,6 +75,7 @@ def reload_index(pdf_dir: str) -> tuple:
     # Clear cache cũ nếu có
     if pdf_dir in INDEX_CACHE:
         del INDEX_CACHE[pdf_dir]
+    clear_store_cache(pdf_dir)
 
     # Load lại
     load_start = time.time()
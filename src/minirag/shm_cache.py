@@ -9,9 +9,11 @@ from __future__ import annotations
 from pathlib import Path
 import hashlib
 import pickle
-from datetime import datetime
+import time
 from typing import Optional, Any
 
+from .shm_validator import _boot_id, _now_tick, check_fingerprint, check_ttl, compute_content_fingerprint
+
 # Use /tmp instead of /dev/shm (avoid RAM disk full issues)
 SHM_DIR = Path("/tmp")
 CACHE_PREFIX = "minirag_faiss"
@@ -25,6 +27,7 @@ class SharedMemoryCache:
         self.settings = get_settings()
         self.pdf_dir = Path(pdf_dir).resolve()
         self.manifest_hash = self._compute_manifest_hash()
+        self.content_fp = self._compute_content_fp()
         self.cache_key = self._compute_cache_key()
         self.cache_path = SHM_DIR / f"{CACHE_PREFIX}_{self.cache_key}.pkl"
         self.meta_path = SHM_DIR / f"{CACHE_PREFIX}_{self.cache_key}.meta"
@@ -37,6 +40,10 @@ class SharedMemoryCache:
         data = manifest_path.read_text()
         return hashlib.md5(data.encode()).hexdigest()
 
+    def _compute_content_fp(self) -> str:
+        """Compute content fingerprint from the PDFs on disk (stat only)."""
+        return compute_content_fingerprint(self.pdf_dir)
+
     def _compute_cache_key(self) -> str:
         """Cache key = MD5(path + manifest_hash)[:16]"""
         combined = f"{self.pdf_dir}::{self.manifest_hash}"
@@ -57,6 +64,17 @@ class SharedMemoryCache:
                     print(f"⚠️  Manifest changed, invalidating cache {self.cache_key}")
                     self.clear()
                     return False
+                # Fingerprint (stat of PDFs on disk) match = fresh regardless of age
+                if check_fingerprint(meta, self.content_fp):
+                    return True
+                if meta.get("content_fp") and self.content_fp:
+                    print(f"⚠️  PDF content changed, invalidating cache {self.cache_key}")
+                    self.clear()
+                    return False
+                # No fingerprint available → fall back to TTL
+                if not check_ttl(meta, self.settings.cache_ttl_hours):
+                    self.clear()
+                    return False
             except Exception as e:
                 print(f"⚠️  Cache metadata corrupted: {e}")
                 self.clear()
@@ -64,19 +82,43 @@ class SharedMemoryCache:
 
         return True
 
+    def is_fresh(self) -> bool:
+        """Check if /tmp/ already holds a copy for the current PDFs (no load)."""
+        if not self.settings.cache_enabled:
+            return False
+        content_fp = self._compute_content_fp()
+        if not content_fp:
+            return False
+        if not self.cache_path.exists() or not self.meta_path.exists():
+            return False
+        try:
+            meta = pickle.loads(self.meta_path.read_bytes())
+        except Exception:
+            return False
+        return (
+            meta.get("manifest_hash") == self.manifest_hash
+            and check_fingerprint(meta, content_fp)
+        )
+
     def save(self, faiss_index: Any) -> None:
         """Save FAISS index to /tmp/"""
         if not self.settings.cache_enabled:
             return
 
+        # Rebuild may have touched pdf_dir (manifest, index dir) since __init__
+        self.content_fp = self._compute_content_fp()
+
         try:
             with open(self.cache_path, 'wb') as f:
                 pickle.dump(faiss_index, f, protocol=pickle.HIGHEST_PROTOCOL)
 
             meta = {
                 "manifest_hash": self.manifest_hash,
+                "content_fp": self.content_fp,
                 "pdf_dir": str(self.pdf_dir),
-                "save_time": datetime.now().isoformat(),
+                "save_time": time.time(),
+                "save_tick": _now_tick(),
+                "boot_id": _boot_id(),
                 "cache_key": self.cache_key,
             }
             with open(self.meta_path, 'wb') as f:
@@ -7,41 +7,130 @@ Separated for SRP (Single Responsibility Principle).
 from __future__ import annotations
 
 from pathlib import Path
+import functools
+import hashlib
+import os
 import shutil
-from datetime import datetime, timedelta
-from typing import Dict
+import time
+from typing import Dict, List
 
 SHM_DIR = Path("/tmp")
 
+# disk_usage memo: a torn read between threads just costs one extra statvfs
+_DU_CACHE: Dict = {"ts": 0.0, "val": None}
+_DU_WINDOW_SEC = 1.0
+
+
+def _disk_usage():
+    """shutil.disk_usage(SHM_DIR), memoized for _DU_WINDOW_SEC (monotonic)."""
+    now = time.monotonic()
+    if _DU_CACHE["val"] is not None and now - _DU_CACHE["ts"] < _DU_WINDOW_SEC:
+        return _DU_CACHE["val"]
+    stats = shutil.disk_usage(SHM_DIR)
+    _DU_CACHE.update(ts=now, val=stats)
+    return stats
+
+
+def _now_tick() -> int:
+    """Monotonic clock in whole seconds (system-wide on Linux, resets on reboot)."""
+    return time.monotonic_ns() // 1_000_000_000
+
+
+@functools.lru_cache(maxsize=1)
+def _boot_id() -> str:
+    """Kernel boot id ("" if unavailable); save_tick is only comparable within one boot."""
+    try:
+        return Path("/proc/sys/kernel/random/boot_id").read_text().strip()
+    except OSError:
+        return ""
+
+
+def check_ttl_bulk(metas: List[Dict], ttl_hours: int) -> List[bool]:
+    """Check TTL for many cache metas against a single clock sample.
+
+    Args:
+        metas: Cache metadata dicts ("save_tick" + "boot_id", "save_time" = epoch)
+        ttl_hours: TTL in hours
+
+    Returns:
+        Freshness flag per meta. Ticks from another boot (or without a boot id)
+        are ignored in favour of the epoch save_time; missing both = expired
+    """
+    now_tick = _now_tick()
+    now_time = time.time()
+    boot_id = _boot_id()
+    ttl_sec = ttl_hours * 3600
+    fresh = []
+    for meta in metas:
+        save_tick = meta.get("save_tick")
+        if boot_id and meta.get("boot_id") == boot_id and isinstance(save_tick, int):
+            age = now_tick - save_tick
+        else:
+            save_time = meta.get("save_time")
+            if not isinstance(save_time, (int, float)):
+                fresh.append(False)
+                continue
+            age = now_time - save_time
+        fresh.append(0 <= age <= ttl_sec)
+    return fresh
+
 
 def check_ttl(meta: Dict, ttl_hours: int) -> bool:
     """Check if cache is within TTL (time-to-live).
 
     Args:
-        meta: Cache metadata dict
+        meta: Cache metadata dict (see check_ttl_bulk)
         ttl_hours: TTL in hours
 
     Returns:
-        True if cache is fresh, False if expired
+        True if cache is fresh, False if expired (or untimed)
     """
-    try:
-        save_time_str = meta.get("save_time")
-        if not save_time_str:
-            return False
+    if check_ttl_bulk([meta], ttl_hours)[0]:
+        return True
+    print(f"⏰ Cache expired (TTL: {ttl_hours}h)")
+    return False
 
-        save_time = datetime.fromisoformat(save_time_str)
-        now = datetime.now()
-        age = now - save_time
 
-        if age > timedelta(hours=ttl_hours):
-            age_hours = age.total_seconds() / 3600
-            print(f"⏰ Cache expired (age: {age_hours:.1f}h > TTL: {ttl_hours}h)")
-            return False
+def compute_content_fingerprint(pdf_dir: Path) -> str:
+    """Stat-based fingerprint of the PDFs currently in pdf_dir (no file reads).
 
-        return True
-    except Exception as e:
-        print(f"⚠️  TTL check failed: {e}")
-        return False
+    Args:
+        pdf_dir: Directory holding the PDFs
+
+    Returns:
+        MD5 hex digest over the directory mtime and sorted (name, size, mtime_ns)
+        of each PDF, "" if there are no PDFs (or the directory is unreadable)
+    """
+    try:
+        with os.scandir(pdf_dir) as it:
+            files = sorted(
+                (entry.name, entry.stat())
+                for entry in it
+                if entry.is_file() and entry.name.lower().endswith(".pdf")
+            )
+        dir_mtime = os.stat(pdf_dir).st_mtime_ns
+    except OSError:
+        return ""
+    if not files:
+        return ""
+    h = hashlib.md5(f"{dir_mtime}\n".encode())
+    for name, st in files:
+        h.update(f"{name}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+def check_fingerprint(meta: Dict, current_fp: str) -> bool:
+    """Check if cached content matches current PDFs (invalidation-based).
+
+    Args:
+        meta: Cache metadata dict
+        current_fp: Fingerprint of current PDFs
+
+    Returns:
+        True if fingerprints match, False if stale or unknown
+    """
+    cached_fp = meta.get("content_fp")
+    return bool(cached_fp) and cached_fp == current_fp
 
 
 def check_space_available(
@@ -64,7 +153,7 @@ def check_space_available(
         True if safe to write, False if space constrained
     """
     try:
-        stats = shutil.disk_usage(SHM_DIR)
+        stats = _disk_usage()
         total = stats.total
         used = stats.used
         free = stats.free
@@ -1,17 +1,33 @@
 from __future__ import annotations
+import os
 import time
 from contextlib import contextmanager
-from typing import Iterator
+from typing import Iterator, List
 from rich.console import Console
 
 console = Console()
 
+_TIMED_FMT = "{}: {:.2f}s"
+
 
 @contextmanager
 def timed(message: str) -> Iterator[None]:
-    start = time.time()
+    """Print elapsed time (perf_counter); silent when MINIRAG_QUIET is set."""
+    start = time.perf_counter()
     try:
         yield
     finally:
-        dur = time.time() - start
-        console.print(f"[bold cyan]{message}[/]: [green]{dur:.2f}s")
+        dur = time.perf_counter() - start
+        if not os.getenv("MINIRAG_QUIET"):
+            console.print(_TIMED_FMT.format(message, dur), markup=False, highlight=False)
+
+
+@contextmanager
+def timed_ns() -> Iterator[List[int]]:
+    """Measure elapsed ns without printing; result in yielded box[0] on exit."""
+    box = [0]
+    start = time.perf_counter_ns()
+    try:
+        yield box
+    finally:
+        box[0] = time.perf_counter_ns() - start
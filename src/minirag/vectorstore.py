@@ -1,16 +1,34 @@
 from __future__ import annotations
 import json
 import hashlib
+import threading
 from pathlib import Path
-from typing import List, Dict
-from langchain_community.vectorstores import FAISS
+from typing import TYPE_CHECKING, List, Dict
 from langchain_core.documents import Document
-from .embedder import get_embeddings
 from .shm_cache import SharedMemoryCache
 
+if TYPE_CHECKING:
+    # Heavy (torch/transformers via embedder) - imported lazily past the cache fast path
+    from langchain_community.vectorstores import FAISS
+
 INDEX_DIR_NAME = ".mini_rag_index"
 MANIFEST_FILE = "manifest.json"
 
+# In-process memo: resolved pdf_dir -> FAISS store (invalidated by force_rebuild / clear_store_cache)
+_STORE_CACHE: Dict[Path, FAISS] = {}
+# One build lock per pdf_dir (registry guarded by _STORE_LOCKS_LOCK)
+_STORE_LOCKS: Dict[Path, threading.Lock] = {}
+_STORE_LOCKS_LOCK = threading.Lock()
+
+
+def _store_lock(pdf_path: Path) -> threading.Lock:
+    """Return the build lock for pdf_path, creating it on first use."""
+    with _STORE_LOCKS_LOCK:
+        lock = _STORE_LOCKS.get(pdf_path)
+        if lock is None:
+            lock = _STORE_LOCKS[pdf_path] = threading.Lock()
+        return lock
+
 
 def _hash_file(p: Path, chunk_size: int = 1024 * 1024) -> str:
     """Return md5 hex digest of a file (streaming)."""
@@ -55,19 +73,30 @@ def _current_pdf_state(
     return state
 
 
-def _load_manifest(path: Path) -> Dict[str, Dict[str, float]]:
+def _read_manifest(path: Path) -> Dict:
+    """Return raw manifest payload ({} if missing/corrupted)."""
     if not path.exists():
         return {}
     try:
         data = json.loads(path.read_text())
-        return data.get("files", {}) if isinstance(data, dict) else {}
+        return data if isinstance(data, dict) else {}
     except Exception:
         return {}
 
 
+def _load_manifest(path: Path) -> Dict[str, Dict[str, float]]:
+    return _read_manifest(path).get("files", {})
+
+
 def _write_manifest(path: Path, files: Dict[str, Dict[str, float]]) -> None:
-    payload = {"version": 1, "files": files}
+    """Write manifest with the parent directory mtime (ns) for scan short-circuit."""
+    existed = path.exists()
+    payload = {"version": 1, "files": files, "dir_mtime": path.parent.stat().st_mtime_ns}
     path.write_text(json.dumps(payload, ensure_ascii=False, indent=2))
+    if not existed:
+        # Creating manifest.json bumps the directory mtime; re-stamp in place
+        payload["dir_mtime"] = path.parent.stat().st_mtime_ns
+        path.write_text(json.dumps(payload, ensure_ascii=False, indent=2))
 
 
 def _needs_rebuild(manifest_files: Dict[str, Dict[str, float]], current: Dict[str, Dict[str, float]]) -> bool:
@@ -83,6 +112,45 @@ def _needs_rebuild(manifest_files: Dict[str, Dict[str, float]], current: Dict[st
 
 
 def build_or_load_vectorstore(pdf_dir: str, force_rebuild: bool = False) -> FAISS:
+    """Build or load FAISS vector store (memoized per process).
+
+    Repeated calls for the same directory within one process return the
+    store built/loaded by the first call without touching manifest, PDFs or
+    /tmp/ cache. force_rebuild=True bypasses and refreshes the memo;
+    clear_store_cache() drops it.
+    Memo hits take no lock; concurrent builds of the same directory
+    serialize on a per-directory lock, so other directories never wait.
+    """
+    pdf_path = Path(pdf_dir).resolve()
+
+    if not force_rebuild:
+        store = _STORE_CACHE.get(pdf_path)
+        if store is not None:
+            return store
+
+    with _store_lock(pdf_path):
+        # Another caller may have finished the build while we waited
+        if not force_rebuild and pdf_path in _STORE_CACHE:
+            return _STORE_CACHE[pdf_path]
+
+        store = _build_or_load_vectorstore(pdf_path, force_rebuild)
+        _STORE_CACHE[pdf_path] = store
+        return store
+
+
+def clear_store_cache(pdf_dir: str | None = None) -> None:
+    """Drop the in-process memo for pdf_dir (all directories if None).
+
+    The next build_or_load_vectorstore call re-checks manifest, PDFs and
+    /tmp/ cache instead of returning the memoized store.
+    """
+    if pdf_dir is None:
+        _STORE_CACHE.clear()
+    else:
+        _STORE_CACHE.pop(Path(pdf_dir).resolve(), None)
+
+
+def _build_or_load_vectorstore(pdf_path: Path, force_rebuild: bool = False) -> FAISS:
     """Build or load FAISS vector store.
 
     Structure:
@@ -101,7 +169,7 @@ def build_or_load_vectorstore(pdf_dir: str, force_rebuild: bool = False) -> FAIS
     """
     from .config import get_settings
 
-    pdf_path = Path(pdf_dir).resolve()  # Normalize to absolute path
+    pdf_dir = str(pdf_path)
     settings = get_settings()
 
     # ── NEW: Shared Memory Cache (/tmp/) ──
@@ -116,6 +184,9 @@ def build_or_load_vectorstore(pdf_dir: str, force_rebuild: bool = False) -> FAIS
         else:
             print("⚠️  Cache corrupted, rebuilding...")
 
+    from langchain_community.vectorstores import FAISS
+    from .embedder import get_embeddings
+
     # ── EXISTING CODE ──
     # Check if directory is blacklisted
     is_blacklisted = any(
@@ -144,15 +215,31 @@ def build_or_load_vectorstore(pdf_dir: str, force_rebuild: bool = False) -> FAIS
         print("✅ Using cached vector store (blacklisted directory)")
         store = FAISS.load_local(str(index_path), embeddings, allow_dangerous_deserialization=True)
 
-        # Save to /tmp/ for next queries
-        shm_cache.save(store)
+        # Save to /tmp/ for next queries (skip if already there)
+        if not shm_cache.is_fresh():
+            shm_cache.save(store)
 
         return store
 
     # manifest.json ở root level của pdf_dir
     manifest_path = pdf_path / MANIFEST_FILE
-    previous = _load_manifest(manifest_path)
-    current = _current_pdf_state(pdf_path, previous, hash_files=True)
+    manifest_data = _read_manifest(manifest_path)
+    previous = manifest_data.get("files", {})
+
+    # Fast path: directory entries unchanged since manifest write → skip scan.
+    # Directory mtime only moves on add/remove/rename, so an in-place PDF edit
+    # goes unnoticed here; force_rebuild skips the fast path and re-stats
+    # (and re-hashes changed) PDFs.
+    if (
+        not force_rebuild
+        and previous
+        and manifest_data.get("dir_mtime") == pdf_path.stat().st_mtime_ns
+        and faiss_index_file.exists()
+        and store_pkl_file.exists()
+    ):
+        current = previous
+    else:
+        current = _current_pdf_state(pdf_path, previous, hash_files=True)
 
     rebuild_needed = _needs_rebuild(previous, current)
     
@@ -189,8 +276,9 @@ def build_or_load_vectorstore(pdf_dir: str, force_rebuild: bool = False) -> FAIS
         if faiss_index_file.exists() and store_pkl_file.exists():
             store = FAISS.load_local(str(index_path), embeddings, allow_dangerous_deserialization=True)
 
-            # Save to /tmp/ for next queries
-            shm_cache.save(store)
+            # Save to /tmp/ for next queries (skip if already there)
+            if not shm_cache.is_fresh():
+                shm_cache.save(store)
 
             return store
         else:
@@ -202,8 +290,9 @@ def build_or_load_vectorstore(pdf_dir: str, force_rebuild: bool = False) -> FAIS
         print("✅ Using cached vector store")
         store = FAISS.load_local(str(index_path), embeddings, allow_dangerous_deserialization=True)
 
-        # Save to /tmp/ for next queries
-        shm_cache.save(store)
+        # Save to /tmp/ for next queries (skip if already there)
+        if not shm_cache.is_fresh():
+            shm_cache.save(store)
 
         return store
 
@@ -224,7 +313,8 @@ def build_or_load_vectorstore(pdf_dir: str, force_rebuild: bool = False) -> FAIS
     _write_manifest(manifest_path, current)
     print(f"✅ Vector store saved to {index_path}")
 
-    # Save to /tmp/ for next queries
-    shm_cache.save(store)
+    # Save to /tmp/ for next queries (skip if already there)
+    if not shm_cache.is_fresh():
+        shm_cache.save(store)
 
     return store
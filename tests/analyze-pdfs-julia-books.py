@@ -4,24 +4,52 @@ Analyze and rename PDF files in Julia-books-nang-cao folder
 following year-first naming convention
 """
 
+import functools
 import os
+from concurrent.futures import ProcessPoolExecutor
 import re
 from pathlib import Path
-import PyPDF2
-
+from pypdf import PdfReader
+
+# extract_year_from_text only scans this many chars; stop reading pages after
+ENOUGH_CHARS = 5000
+
+# Year patterns fused into one pass; prefix group tells which rule matched.
+# Empty alternative (\b) = generic 4-digit year.
+_YEAR_TEXT_RE = re.compile(
+    r'(?:(?P<copyright>Copyright\s*©?\s*)'  # Copyright 2023 or Copyright © 2023
+    r'|(?P<symbol>©\s*)'                    # © 2023
+    r'|(?P<published>Published.*?)'         # Published 2023
+    r'|(?P<date>May\s+\d+,\s+)'             # May 10, 2013
+    r'|\b)'
+    r'(?P<y>(?:19|20)\d{2})\b',
+    re.IGNORECASE,
+)
+# Priority order (first label with any hit wins)
+_YEAR_LABELS = [
+    ('copyright', 'Copyright'),
+    ('symbol', 'Copyright symbol'),
+    ('published', 'Published'),
+    ('date', 'Date'),
+    (None, 'Generic 4-digit'),
+]
+_YEAR_FN_RE = re.compile(r'\b(19|20)\d{2}\b')
+_RENAMED_RE = re.compile(r'^\d{4}-')
+
+@functools.lru_cache(maxsize=256)
 def read_pdf_first_pages(pdf_path, num_pages=5):
-    """Extract text from first N pages of PDF"""
+    """Extract text from first N pages of PDF (stops early once ENOUGH_CHARS)"""
     try:
-        with open(pdf_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            total_pages = min(num_pages, len(reader.pages))
+        reader = PdfReader(pdf_path, strict=False)
+        total_pages = min(num_pages, len(reader.pages))
 
-            text = ""
-            for i in range(total_pages):
-                page = reader.pages[i]
-                text += page.extract_text() + "\n\n"
+        text = ""
+        for i in range(total_pages):
+            text += (reader.pages[i].extract_text() or "") + "\n\n"
+            if len(text) >= ENOUGH_CHARS:
+                break
 
-            return text
+        return text
     except Exception as e:
         return f"Error reading PDF: {e}"
 
@@ -31,41 +59,50 @@ def extract_year_from_filename(filename):
     parts = filename.split(' -- ')
     if len(parts) >= 3:
         # Year is in the 3rd part
-        year_match = re.search(r'\b(19|20)\d{2}\b', parts[2])
+        year_match = _YEAR_FN_RE.search(parts[2])
         if year_match:
             return year_match.group(0)
     return None
 
-def extract_year_from_text(text):
-    """Extract publication year from PDF text (first pages)"""
-    # Look for copyright year, publication year, etc.
-    patterns = [
-        (r'Copyright\s*©?\s*(19|20)\d{2}', 'Copyright'),  # Copyright 2023 or Copyright © 2023
-        (r'©\s*(19|20)\d{2}', 'Copyright symbol'),  # © 2023
-        (r'Published.*?(19|20)\d{2}', 'Published'),  # Published 2023
-        (r'May\s+\d+,\s+(19|20)\d{2}', 'Date'),  # May 10, 2013
-        (r'\b(19|20)\d{2}\b', 'Generic 4-digit'),  # Any 4-digit year
-    ]
-
-    for pattern, label in patterns:
-        matches = re.findall(pattern, text[:5000], re.IGNORECASE)  # Search first 5000 chars
-        if matches:
+def _extract_year_with_label(text):
+    """Return (year, pattern label) from PDF text, or (None, None)"""
+    # Look for copyright year, publication year, etc. (first 5000 chars)
+    found = {}
+    for m in _YEAR_TEXT_RE.finditer(text, 0, 5000):
+        key = next((k for k, _ in _YEAR_LABELS[:-1] if m.group(k) is not None), None)
+        found.setdefault(key, []).append(m.group('y'))
+
+    for key, label in _YEAR_LABELS:
+        years = found.get(key)
+        if years:
             # Return most recent year found
-            years = []
-            for m in matches:
-                if isinstance(m, tuple):
-                    year = m[0] + m[1] if len(m) == 2 else ''.join(m)
-                else:
-                    year = m
-                if len(year) == 4 and year.isdigit():
-                    years.append(year)
-
-            if years:
-                most_recent = max(years)
-                print(f"  Found year {most_recent} from pattern: {label}")
-                return most_recent
+            return max(years), label
 
-    return None
+    return None, None
+
+def extract_year_from_text(text):
+    """Extract publication year from PDF text (first pages)"""
+    year, label = _extract_year_with_label(text)
+    if year:
+        print(f"  Found year {year} from pattern: {label}")
+    return year
+
+def process_pdf(pdf_file):
+    """Analyze one PDF (runs in worker process, no printing)"""
+    year_fn = extract_year_from_filename(pdf_file.name)
+    text = read_pdf_first_pages(pdf_file, num_pages=5)
+    if text.startswith("Error"):
+        return {"name": pdf_file.name, "year_fn": year_fn, "error": text}
+
+    year_txt, label = _extract_year_with_label(text)
+    return {
+        "name": pdf_file.name,
+        "year_fn": year_fn,
+        "year_txt": year_txt,
+        "label": label,
+        "preview": text[:500].strip(),
+        "final": year_fn or year_txt or "Unknown",
+    }
 
 def main():
     folder = Path("/home/fong/Dropbox/PDFs/Julia-books-nang-cao")
@@ -77,42 +114,39 @@ def main():
 
     # Get all PDF files (not EPUB, exclude already renamed)
     pdf_files = [f for f in folder.glob("*.pdf")
-                 if not re.match(r'^\d{4}-', f.name)]
+                 if not _RENAMED_RE.match(f.name)]
 
-    for idx, pdf_file in enumerate(pdf_files, 1):
+    # PDF parsing is CPU-bound and per-file independent; print afterwards in order
+    with ProcessPoolExecutor() as ex:
+        results = list(ex.map(process_pdf, pdf_files, chunksize=4))
+
+    for idx, r in enumerate(results, 1):
         print(f"\n{'='*80}")
-        print(f"FILE {idx}: {pdf_file.name}")
+        print(f"FILE {idx}: {r['name']}")
         print(f"{'='*80}")
 
-        # Extract year from filename first
-        year_from_filename = extract_year_from_filename(pdf_file.name)
-        print(f"Year from filename: {year_from_filename or 'Not found'}")
-
-        # Read first pages
+        print(f"Year from filename: {r['year_fn'] or 'Not found'}")
         print(f"\nReading first 5 pages...")
-        text = read_pdf_first_pages(pdf_file, num_pages=5)
 
-        if text.startswith("Error"):
-            print(f"❌ {text}")
+        if "error" in r:
+            print(f"❌ {r['error']}")
             continue
 
-        # Extract year from text
-        year_from_text = extract_year_from_text(text)
-        print(f"Year from PDF content: {year_from_text or 'Not found'}")
+        if r['year_txt']:
+            print(f"  Found year {r['year_txt']} from pattern: {r['label']}")
+        print(f"Year from PDF content: {r['year_txt'] or 'Not found'}")
 
         # Show first 500 chars for context
         print(f"\nFirst 500 chars of PDF:")
         print("-" * 80)
-        print(text[:500].strip())
+        print(r['preview'])
         print("-" * 80)
 
-        # Determine final year
-        final_year = year_from_filename or year_from_text or "Unknown"
-        print(f"\n✅ Final year to use: {final_year}")
+        print(f"\n✅ Final year to use: {r['final']}")
 
         # Show current filename structure
-        if " -- " in pdf_file.name:
-            parts = pdf_file.name.split(' -- ')
+        if " -- " in r['name']:
+            parts = r['name'].split(' -- ')
             print(f"\nCurrent structure:")
             print(f"  Title: {parts[0] if len(parts) > 0 else 'N/A'}")
             print(f"  Author: {parts[1] if len(parts) > 1 else 'N/A'}")
@@ -33,34 +33,59 @@ _load_env_from_ragon_root()
 DOWNLOADS_DIR = Path(os.getenv("DOWNLOADS_DIR", str(Path.home() / "Downloads")))
 DKM_PDFS_DIR = Path(os.getenv("DKM_PDF_PATH", "DKM-PDFs"))
 
+_YEAR_PREFIX_RE = re.compile(r'^\d{4}-')
+_EXT_RE = re.compile(r'\.(pdf|PDF)$')
+_EMOJI_RE = re.compile(r'[✅✓✔️❌]')
+_SPLIT_RE = re.compile(r'[-_]')
+# Known author names as one alternation (single scan instead of 7 substring tests)
+_AUTHOR_NAMES = ('Martin', 'Hunt', 'Thomas', 'Fowler', 'Russell', 'Goodfellow')
+_AUTHOR_RE = re.compile('|'.join(_AUTHOR_NAMES))
+
 def extract_author_and_title(filename):
     """Extract author name and core title from filename."""
     # Remove year prefix (e.g., "2024-")
-    name = re.sub(r'^\d{4}-', '', filename)
+    name = _YEAR_PREFIX_RE.sub('', filename)
     # Remove extension
-    name = re.sub(r'\.(pdf|PDF)$', '', name)
+    name = _EXT_RE.sub('', name)
     # Remove emojis and special chars
-    name = re.sub(r'[✅✓✔️❌]', '', name)
+    name = _EMOJI_RE.sub('', name)
 
     # Split by delimiters
-    parts = re.split(r'[-_]', name)
+    parts = _SPLIT_RE.split(name)
 
-    # Try to find author (usually has firstname-lastname pattern)
-    author_parts = []
-    title_parts = []
+    # Collect first 2-3 words as potential title
+    title_parts = parts[:3]
 
-    for i, part in enumerate(parts):
-        # Collect first 2-3 words as potential title
-        if i < 3:
-            title_parts.append(part)
-        # Look for author pattern (capital letters, common names)
-        if any(word in part for word in ['Martin', 'Hunt', 'Thomas', 'Fowler', 'Martin', 'Russell', 'Goodfellow']):
-            author_parts.append(part)
+    # Look for author pattern (common names); whole-name probe skips most files
+    author_parts = []
+    if _AUTHOR_RE.search(name):
+        author_parts = [part for part in parts if _AUTHOR_RE.search(part)]
 
     return title_parts[:2], author_parts
 
-def search_in_dkm(title_parts, author_parts):
-    """Search for title and author in DKM-PDFs metadata using rg."""
+def load_dkm_blob():
+    """Dump all DKM-PDFs JSON metadata with a single rg call (lowercased).
+
+    Returns None if rg fails, so callers fall back to per-query rg.
+    """
+    try:
+        cmd = ['rg', '--no-filename', '--type', 'json', '.', str(DKM_PDFS_DIR)]
+        out = subprocess.check_output(cmd, stderr=subprocess.DEVNULL, timeout=60)
+        return out.decode('utf-8', 'ignore').lower()
+    except Exception:
+        return None
+
+def search_in_dkm(title_parts, author_parts, blob=None):
+    """Search for title and author in DKM-PDFs metadata.
+
+    With blob (from load_dkm_blob): pure substring checks, no subprocess.
+    Without: one rg call per query (legacy path).
+    """
+    if blob is not None:
+        if title_parts and ' '.join(title_parts[:2]).lower() in blob:
+            return True
+        return any(len(author) > 3 and author.lower() in blob for author in author_parts)
+
     try:
         # Search by title first (first 2 words)
         if title_parts:
@@ -88,6 +113,7 @@ def main():
 
     not_found = []
     found = []
+    dkm_blob = load_dkm_blob()
 
     print(f"Checking {len(pdfs)} PDFs in Downloads/...\n")
 
@@ -95,7 +121,7 @@ def main():
         filename = pdf.name
         title_parts, author_parts = extract_author_and_title(filename)
 
-        if search_in_dkm(title_parts, author_parts):
+        if search_in_dkm(title_parts, author_parts, blob=dkm_blob):
             found.append(filename)
             print(f"✅ {filename}")
         else:
@@ -0,0 +1,34 @@
+"""Shared .env loader for the pdf-conversion scripts."""
+
+from __future__ import annotations
+
+import functools
+import mmap
+import os
+import re
+from pathlib import Path
+
+# KEY=value / KEY="value" lines; comments and blank lines never match
+_ENV_LINE_RE = re.compile(rb'^[ \t]*([^#\s][^=\s]*)[ \t]*=[ \t]*"?([^"\n\r]*)"?[ \t]*\r?$', re.M)
+
+
+@functools.lru_cache(maxsize=1)
+def load_env() -> dict[str, str]:
+    """Load the first .env found walking up from this directory (once per process)."""
+    here = Path(__file__).resolve()
+    for parent in here.parents[:4]:
+        env_file = parent / ".env"
+        if not env_file.exists():
+            continue
+        with open(env_file, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return {}
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                pairs = {
+                    k.decode("utf-8"): v.decode("utf-8").strip()
+                    for k, v in _ENV_LINE_RE.findall(data)
+                }
+        for k, v in pairs.items():
+            os.environ.setdefault(k, v)
+        return pairs
+    return {}
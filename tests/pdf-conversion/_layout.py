@@ -0,0 +1,57 @@
+"""Shared monospace text layout for the pdf-conversion scripts."""
+
+from __future__ import annotations
+
+import itertools
+import textwrap
+
+# Fixed monospace page layout in mm (fpdf2's default unit)
+FONT = "Courier"
+FONT_SIZE = 7
+LINE_H = 3.5
+MARGIN_X = 10
+MARGIN_TOP = 10
+MARGIN_BOTTOM = 15
+
+BATCH_LINES = 1000  # Lines per progress update
+
+
+def chars_per_line(page_w: float, glyph_w: float) -> int:
+    """Courier is monospaced: one glyph width gives the line capacity."""
+    return int(page_w // glyph_w)
+
+
+def wrap_lines(lines, width):
+    """Yield lines pre-wrapped to width chars (short lines pass through)."""
+    for line in lines:
+        if len(line) <= width:
+            yield line
+        else:
+            yield from textwrap.wrap(line, width=width, drop_whitespace=False, replace_whitespace=False)
+
+
+def emit_lines(pdf, lines, h):
+    """fpdf2: emit pre-wrapped lines as single cells (no multi_cell layout pass)."""
+    for line in lines:
+        pdf.cell(0, h, line, new_x="LMARGIN", new_y="NEXT")
+
+
+def draw_lines(c, lines, x, top, leading, lines_per_page, font=FONT, size=FONT_SIZE):
+    """reportlab: draw pre-wrapped lines one page at a time.
+
+    Each page is a single BT/ET text object (font and leading set once),
+    instead of one positioned drawString per line.
+    """
+    lines = iter(lines)
+    first = True
+    while True:
+        page = list(itertools.islice(lines, lines_per_page))
+        if not page:
+            break
+        if not first:
+            c.showPage()
+        first = False
+        text = c.beginText(x, top)
+        text.setFont(font, size, leading=leading)
+        text.textLines(page, trim=0)
+        c.drawText(text)
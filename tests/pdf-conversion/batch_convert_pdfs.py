@@ -1,178 +1,244 @@
 #!/usr/bin/env python3
 """Batch convert PDFs to text and then to new PDFs with 'text-*' prefix."""
 
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
 import os
 import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+from typing import Iterable, Iterator
 
 # Load .env from RagON root
-def _load_env():
-    current = Path(__file__).resolve().parent
-    for _ in range(4):
-        env_file = current / ".env"
-        if env_file.exists():
-            with open(env_file, "r") as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith("#") and "=" in line:
-                        k, _, v = line.partition("=")
-                        os.environ.setdefault(k.strip(), v.strip().strip('"'))
-            break
-        current = current.parent
-
-_load_env()
+from _env import load_env
+from _layout import FONT, FONT_SIZE, LINE_H, MARGIN_BOTTOM, MARGIN_TOP, MARGIN_X, chars_per_line, draw_lines, wrap_lines
+
+load_env()
 RAGON_ROOT = os.getenv("RAGON_ROOT", "/home/fong/Projects/RagON")
-from fpdf import FPDF
+PDF_DIR = Path(RAGON_ROOT) / "PDFs"
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # fall back to poppler's pdftotext on stdout
+    pdfium = None
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn
 from rich.table import Table
 
 console = Console()
 
+# C0 controls except \t and \n, plus DEL, dropped per line. Line breaks
+# (\r\n, \r, \f, \v) are turned into \n before splitting, in convert_text_to_pdf
+_ASCII_CTRL_DROP = dict.fromkeys([*range(0x00, 0x09), *range(0x0B, 0x20), 0x7F])
+
 
 def clean_text(text: str) -> str:
     """Remove special characters that may cause issues in PDF."""
-    # Remove form feed and other problematic control characters
-    text = text.replace('\f', '\n')  # Form feed ␌ -> newline
-    text = text.replace('\v', '\n')  # Vertical tab -> newline
-    text = text.replace('\r\n', '\n')  # Windows line endings
-    text = text.replace('\r', '\n')  # Old Mac line endings
+    return text.translate(_ASCII_CTRL_DROP)
 
-    # Remove other control characters except newline and tab
-    # Keep printable chars + \n + \t
-    text = ''.join(char for char in text if char == '\n' or char == '\t' or (ord(char) >= 32 and ord(char) < 127) or ord(char) >= 128)
 
-    return text
+def sanitize_text(text: str) -> str:
+    """Map text onto what the Courier core font can draw ('?' for the rest).
 
+    reportlab's standard fonts use WinAnsi (cp1252), which covers latin-1
+    plus curly quotes and dashes.
+    """
+    return text.encode('cp1252', errors='replace').decode('cp1252')
 
-def extract_text_from_pdf(pdf_path: Path) -> Path:
-    """Extract text from PDF using pdftotext command."""
-    txt_path = pdf_path.with_suffix('.txt')
 
-    console.print(f"[cyan]Extracting text: {pdf_path.name}[/cyan]")
+# reportlab works in points: page geometry from the shared mm layout
+_CHARS_PER_LINE = chars_per_line(A4[0] - 2 * MARGIN_X * mm, stringWidth("M", FONT, FONT_SIZE))
+_TOP = A4[1] - MARGIN_TOP * mm - FONT_SIZE  # first baseline
+LINES_PER_PAGE = int((_TOP - MARGIN_BOTTOM * mm) // (LINE_H * mm)) + 1
 
-    # Use pdftotext command
-    result = subprocess.run(
-        ['pdftotext', str(pdf_path), str(txt_path)],
-        capture_output=True,
-        text=True
-    )
 
-    if result.returncode != 0:
-        console.print(f"[red]Error extracting {pdf_path.name}[/red]")
+def _stream_pdftotext(pdf_path: Path) -> Iterator[str]:
+    """Stream pdftotext stdout ('-') line by line while it is still extracting.
+
+    -nopgbrk/-eol unix keep \f and \r out of the output, so clean_text
+    has almost nothing left to scrub.
+    """
+    proc = subprocess.Popen(
+        ['pdftotext', '-nopgbrk', '-enc', 'UTF-8', '-eol', 'unix', str(pdf_path), '-'],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        bufsize=1024 * 1024,
+    )
+    try:
+        for raw in proc.stdout:
+            yield raw.decode('utf-8', errors='ignore').rstrip('\n')
+    finally:
+        proc.stdout.close()
+        returncode = proc.wait()
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, proc.args)
+
+
+def _stream_pdfium(pdf_path: Path) -> Iterator[str]:
+    """Stream lines page by page from PDFium (pages separated by a blank line)."""
+    pdf = pdfium.PdfDocument(str(pdf_path))
+    try:
+        for index, page in enumerate(pdf):
+            if index:
+                yield ''
+            # PDFium emits CRLF line endings (and no form feeds between pages)
+            text = page.get_textpage().get_text_range()
+            yield from text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    finally:
+        pdf.close()
+
+
+def stream_text_from_pdf(pdf_path: Path) -> Iterator[str]:
+    """Extract text lines lazily (pypdfium2, else pdftotext stdout).
+
+    Lines are produced while the PDF is being emitted, so extraction
+    overlaps with convert_lines_to_pdf instead of running before it.
+    """
+    console.print(f"[cyan]Extracting text: {pdf_path.name}[/cyan]")
+    if pdfium is not None:
+        return _stream_pdfium(pdf_path)
+    return _stream_pdftotext(pdf_path)
+
+
+def _tee_lines(lines: Iterable[str], stats: dict, txt_file=None) -> Iterator[str]:
+    """Pass lines through, counting UTF-8 bytes (and copying to txt_file).
+
+    An error raised by the extractor (or the txt copy) sets
+    stats['stage'] = 'Extract' before propagating, so the caller can tell
+    it apart from a convert error raised mid-stream.
+    """
+    size = 0
+    lines = iter(lines)
+    while True:
+        try:
+            line = next(lines, None)
+            if line is None:
+                break
+            if txt_file is not None:
+                txt_file.write(line + '\n')
+        except Exception:
+            stats['stage'] = 'Extract'
+            raise
+        size += len(line.encode('utf-8')) + 1
+        yield line
+    stats['txt_bytes'] = size
+
+
+def convert_lines_to_pdf(lines: Iterable[str], pdf_path: Path) -> tuple[Path, int] | None:
+    """Convert a stream of text lines to PDF; returns (path, size in bytes)."""
+    console.print(f"[cyan]Converting to PDF: {pdf_path.name}[/cyan]")
+
+    # Clean text (validated once per line, so drawing never has to fail)
+    lines = (sanitize_text(clean_text(line)) for line in lines)
+
+    # Create PDF: one BT/ET text object per page, no per-line layout engine
+    c = canvas.Canvas(str(pdf_path), pagesize=A4)
+    draw_lines(c, wrap_lines(lines, _CHARS_PER_LINE), MARGIN_X * mm, _TOP, LINE_H * mm, LINES_PER_PAGE)
+    c.save()
+
+    try:
+        size = os.stat(pdf_path).st_size
+    except FileNotFoundError:
         return None
+    console.print(f"[green]✓ Created PDF {size / (1024 * 1024):.1f} MB[/green]")
+    return pdf_path, size
 
-    if txt_path.exists():
-        size_mb = txt_path.stat().st_size / (1024 * 1024)
-        console.print(f"[green]✓ Extracted {size_mb:.1f} MB[/green]")
-        return txt_path
-
-    return None
-
-
-def convert_text_to_pdf(text_path: Path) -> Path:
-    """Convert text file to PDF."""
-    # Output PDF with 'text-' prefix
-    pdf_path = text_path.parent / f"text-{text_path.stem}.pdf"
-
-    console.print(f"[cyan]Converting to PDF: {text_path.name}[/cyan]")
-
-    # Read and clean text
-    text = text_path.read_text(encoding='utf-8', errors='ignore')
-    text = clean_text(text)
-
-    # Create PDF
-    pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    pdf.add_page()
-    pdf.set_font("Courier", size=7)
-
-    lines = text.split('\n')
-
-    for line in lines:
-        if line.strip():
-            try:
-                # Limit line length to prevent issues
-                max_line_len = 150
-                if len(line) > max_line_len:
-                    # Split long lines
-                    for j in range(0, len(line), max_line_len):
-                        chunk = line[j:j+max_line_len]
-                        pdf.multi_cell(0, 3.5, chunk, align='L')
-                else:
-                    pdf.multi_cell(0, 3.5, line, align='L')
-            except Exception:
-                # Skip problematic lines silently
-                pass
-        else:
-            pdf.ln(3.5)
 
-    pdf.output(str(pdf_path))
+def convert_text_to_pdf(text: str, pdf_path: Path) -> tuple[Path, int] | None:
+    """Convert extracted text to PDF."""
+    # Arbitrary text: page breaks, vertical tabs and CR/CRLF endings start a new line
+    text = text.replace('\r\n', '\n').replace('\r', '\n').replace('\f', '\n').replace('\v', '\n')
+    return convert_lines_to_pdf(text.split('\n'), pdf_path)
+
+
+def _process_one(pdf_path: Path, keep_txt: bool = False) -> dict:
+    """Run extract → convert for one PDF (worker process).
+
+    Console output is captured into the result's 'log' so parallel
+    workers don't interleave; the parent prints it per completed file.
+    """
+    global console
+    buf = io.StringIO()
+    console = Console(file=buf, force_terminal=True)
+    console.print(f"Source: {pdf_path.name}\n")
+
+    result = {'file': pdf_path.name, 'status': 'Success', 'txt_size': '-', 'pdf_size': '-'}
 
-    if pdf_path.exists():
-        size_mb = pdf_path.stat().st_size / (1024 * 1024)
-        console.print(f"[green]✓ Created PDF {size_mb:.1f} MB[/green]")
-        return pdf_path
+    # Extract → convert as one pipeline (no .txt intermediate unless --keep-txt)
+    stats = {'stage': 'Extract'}
+    txt_path = pdf_path.with_suffix('.txt')
+    try:
+        with contextlib.ExitStack() as stack:
+            txt_file = stack.enter_context(open(txt_path, 'w', encoding='utf-8')) if keep_txt else None
+            lines = _tee_lines(stream_text_from_pdf(pdf_path), stats, txt_file)
+            # Convert to PDF with 'text-' prefix; extractor errors flip stage back
+            stats['stage'] = 'Convert'
+            output = convert_lines_to_pdf(lines, pdf_path.parent / f"text-{pdf_path.stem}.pdf")
+    except Exception as e:
+        console.print(f"[red]Error converting {pdf_path.name}: {e}[/red]")
+        result['status'] = f"{stats['stage']} failed"
+    else:
+        size_mb = stats['txt_bytes'] / (1024 * 1024)
+        console.print(f"[green]✓ Extracted {size_mb:.1f} MB[/green]")
+        result['txt_size'] = f"{size_mb:.1f} MB"
+        if keep_txt:
+            console.print(f"[dim]Kept text: {txt_path.name}[/dim]")
+        if not output:
+            result['status'] = 'Convert failed'
+        else:
+            result['pdf_size'] = f"{output[1] / (1024*1024):.1f} MB"
 
-    return None
+    result['log'] = buf.getvalue()
+    return result
 
 
 def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--keep-txt", action="store_true",
+                        help="also write the extracted text next to each PDF")
+    args = parser.parse_args()
+
     # List of PDFs to process (using env var)
-    pdf_dir = Path(RAGON_ROOT) / "PDFs"
     pdf_files = [
-        pdf_dir / "2019-Hands-On-Machine-Learning-with-Scikit-Learn-Keras-and-TensorFlow_-Concepts-Tools-and-Techniques-to-Build-Intelligent-Systems-Aurélien-Géron-OReilly.PDF",
-        pdf_dir / "2022-Natural-Language-Processing-with-Transformers_-Building-Language-Applications-with-Hugging-Face-Lewis-Tunstall-Leandro-von-Werra-Thomas-Wolf.PDF",
-        pdf_dir / "2023-Generative-Deep-Learning_-Teaching-Machines-To-Paint-Write-Compose-and-Play-David-Foster-OReilly.PDF",
+        PDF_DIR / "2019-Hands-On-Machine-Learning-with-Scikit-Learn-Keras-and-TensorFlow_-Concepts-Tools-and-Techniques-to-Build-Intelligent-Systems-Aurélien-Géron-OReilly.PDF",
+        PDF_DIR / "2022-Natural-Language-Processing-with-Transformers_-Building-Language-Applications-with-Hugging-Face-Lewis-Tunstall-Leandro-von-Werra-Thomas-Wolf.PDF",
+        PDF_DIR / "2023-Generative-Deep-Learning_-Teaching-Machines-To-Paint-Write-Compose-and-Play-David-Foster-OReilly.PDF",
     ]
 
     console.print("\n[bold cyan]Batch PDF to Text to PDF Conversion[/bold cyan]")
     console.print(f"Processing {len(pdf_files)} files\n")
 
-    results = []
-
-    for i, pdf_path in enumerate(pdf_files, 1):
-        console.print(f"\n[bold yellow]═══ File {i}/{len(pdf_files)} ═══[/bold yellow]")
-        console.print(f"Source: {pdf_path.name}\n")
-
-        if not pdf_path.exists():
-            console.print(f"[red]✗ File not found: {pdf_path}[/red]")
-            results.append({
-                'file': pdf_path.name,
-                'status': 'Not found',
-                'txt_size': '-',
-                'pdf_size': '-'
-            })
-            continue
-
-        # Extract text
-        txt_path = extract_text_from_pdf(pdf_path)
-        if not txt_path:
-            results.append({
-                'file': pdf_path.name,
-                'status': 'Extract failed',
-                'txt_size': '-',
-                'pdf_size': '-'
-            })
-            continue
-
-        # Convert to PDF
-        output_pdf = convert_text_to_pdf(txt_path)
-        if not output_pdf:
-            results.append({
-                'file': pdf_path.name,
-                'status': 'Convert failed',
-                'txt_size': f"{txt_path.stat().st_size / (1024*1024):.1f} MB",
-                'pdf_size': '-'
-            })
-            continue
-
-        results.append({
-            'file': pdf_path.name,
-            'status': 'Success',
-            'txt_size': f"{txt_path.stat().st_size / (1024*1024):.1f} MB",
-            'pdf_size': f"{output_pdf.stat().st_size / (1024*1024):.1f} MB"
-        })
+    # One scandir instead of an exists() probe per file
+    try:
+        with os.scandir(PDF_DIR) as it:
+            present = {entry.name: entry for entry in it}
+    except FileNotFoundError:
+        present = {}
+
+    results = [None] * len(pdf_files)
+    todo = []
+    for i, p in enumerate(pdf_files):
+        if p.name in present:
+            todo.append(i)
+        else:
+            console.print(f"[red]✗ File not found: {p}[/red]")
+            results[i] = {'file': p.name, 'status': 'Not found', 'txt_size': '-', 'pdf_size': '-'}
+
+    # Each extract → convert pipeline is independent: one worker per file
+    max_workers = max(1, min(len(todo), os.cpu_count() or 1))
+    with ProcessPoolExecutor(max_workers=max_workers) as ex:
+        futures = {ex.submit(_process_one, pdf_files[i], args.keep_txt): i for i in todo}
+        for done, future in enumerate(as_completed(futures), 1):
+            i = futures[future]
+            results[i] = future.result()
+            console.print(f"\n[bold yellow]═══ File {done}/{len(todo)} ═══[/bold yellow]")
+            console.file.write(results[i].pop('log'))
 
     # Display summary table
     console.print("\n[bold cyan]═══ Summary ═══[/bold cyan]\n")
@@ -3,26 +3,16 @@
 
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 # Load .env from RagON root
-def _load_env():
-    current = Path(__file__).resolve().parent
-    for _ in range(4):
-        env_file = current / ".env"
-        if env_file.exists():
-            with open(env_file, "r") as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith("#") and "=" in line:
-                        k, _, v = line.partition("=")
-                        os.environ.setdefault(k.strip(), v.strip().strip('"'))
-            break
-        current = current.parent
-
-_load_env()
+from _env import load_env
+from _layout import BATCH_LINES, FONT, MARGIN_BOTTOM, chars_per_line, emit_lines, wrap_lines
+
+load_env()
 RAGON_ROOT = os.getenv("RAGON_ROOT", "/home/fong/Projects/RagON")
-from pypdf import PdfReader
+import pypdfium2 as pdfium
 from fpdf import FPDF
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
@@ -30,8 +20,23 @@ from rich.progress import Progress, SpinnerColumn, TextColumn
 console = Console()
 
 
+# Per-worker-process document cache (PDFium is not thread-safe, so pages
+# are spread over processes, each opening the PDF once)
+_WORKER_DOCS: dict = {}
+
+
+def _extract_page(args) -> str:
+    """Extract text of one page (runs in worker process)."""
+    path_str, index = args
+    pdf = _WORKER_DOCS.get(path_str)
+    if pdf is None:
+        pdf = _WORKER_DOCS[path_str] = pdfium.PdfDocument(path_str)
+    # PDFium emits CRLF line endings
+    return pdf[index].get_textpage().get_text_range().replace('\r\n', '\n')
+
+
 def extract_text_from_pdf(pdf_path: Path) -> str:
-    """Extract all text from PDF file."""
+    """Extract all text from PDF file (pages in parallel, order preserved)."""
     console.print(f"\n[cyan]Reading PDF: {pdf_path.name}[/cyan]")
 
     with Progress(
@@ -41,15 +46,17 @@ def extract_text_from_pdf(pdf_path: Path) -> str:
     ) as progress:
         task = progress.add_task("Extracting text...", total=None)
 
-        reader = PdfReader(str(pdf_path))
-        text_parts = []
-        total_pages = len(reader.pages)
+        pdf = pdfium.PdfDocument(str(pdf_path))
+        total_pages = len(pdf)
+        pdf.close()
 
-        for i, page in enumerate(reader.pages, 1):
-            progress.update(task, description=f"Extracting page {i}/{total_pages}")
-            text = page.extract_text()
-            if text.strip():
-                text_parts.append(text)
+        text_parts = []
+        jobs = [(str(pdf_path), i) for i in range(total_pages)]
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+            for i, text in enumerate(ex.map(_extract_page, jobs, chunksize=16), 1):
+                progress.update(task, description=f"Extracting page {i}/{total_pages}")
+                if text.strip():
+                    text_parts.append(text)
 
         progress.update(task, description=f"Extracted {total_pages} pages")
 
@@ -67,11 +74,15 @@ def convert_text_to_pdf(text: str, output_path: Path) -> None:
     """Convert text to PDF using fpdf2."""
     console.print(f"\n[cyan]Creating PDF: {output_path}[/cyan]")
 
+    # Courier is a latin-1 core font: replace what it can't encode with '?'
+    # once up front instead of catching fpdf2 errors line by line
+    text = text.encode('latin-1', errors='replace').decode('latin-1')
+
     # Create PDF document
     pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.set_auto_page_break(auto=True, margin=MARGIN_BOTTOM)
     pdf.add_page()
-    pdf.set_font("Courier", size=10)
+    pdf.set_font(FONT, size=10)
 
     with Progress(
         SpinnerColumn(),
@@ -81,21 +92,12 @@ def convert_text_to_pdf(text: str, output_path: Path) -> None:
         task = progress.add_task("Building PDF...", total=None)
 
         # Split text into lines
-        lines = text.split('\n')
-
-        for i, line in enumerate(lines, 1):
-            if i % 1000 == 0:
-                progress.update(task, description=f"Processing line {i:,}/{len(lines):,}")
-
-            # fpdf2 handles Unicode text well
-            if line.strip():
-                try:
-                    pdf.multi_cell(0, 5, line, align='L')
-                except Exception:
-                    # Skip lines that cause encoding issues
-                    pdf.multi_cell(0, 5, "[line with encoding issue]", align='L')
-            else:
-                pdf.ln(5)  # Add spacing for empty lines
+        cpl = chars_per_line(pdf.w - pdf.l_margin - pdf.r_margin, pdf.get_string_width("M"))
+        lines = list(wrap_lines(text.split('\n'), cpl))
+
+        for start in range(0, len(lines), BATCH_LINES):
+            progress.update(task, description=f"Processing line {start:,}/{len(lines):,}")
+            emit_lines(pdf, lines[start:start + BATCH_LINES], 5)
 
         progress.update(task, description="Saving PDF...")
         pdf.output(str(output_path))
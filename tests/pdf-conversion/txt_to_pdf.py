@@ -1,27 +1,18 @@
 #!/usr/bin/env python3
 """Convert text file to PDF using fpdf2."""
 
+import mmap
 import os
 import re
 from pathlib import Path
 
 # Load .env from RagON root
-def _load_env():
-    current = Path(__file__).resolve().parent
-    for _ in range(4):
-        env_file = current / ".env"
-        if env_file.exists():
-            with open(env_file, "r") as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith("#") and "=" in line:
-                        k, _, v = line.partition("=")
-                        os.environ.setdefault(k.strip(), v.strip().strip('"'))
-            break
-        current = current.parent
-
-_load_env()
+from _env import load_env
+from _layout import BATCH_LINES, FONT, FONT_SIZE, LINE_H, MARGIN_BOTTOM, chars_per_line, emit_lines, wrap_lines
+
+load_env()
 RAGON_ROOT = os.getenv("RAGON_ROOT", "/home/fong/Projects/RagON")
+import numpy as np
 from fpdf import FPDF
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
@@ -29,41 +20,62 @@ from rich.progress import Progress, SpinnerColumn, TextColumn
 console = Console()
 
 
-def clean_text(text: str) -> str:
-    """Remove special characters that may cause issues in PDF."""
-    # Remove form feed and other problematic control characters
-    text = text.replace('\f', '\n')  # Form feed ␌ -> newline
-    text = text.replace('\v', '\n')  # Vertical tab -> newline
-    text = text.replace('\r\n', '\n')  # Windows line endings
-    text = text.replace('\r', '\n')  # Old Mac line endings
+# Byte-level clean (UTF-8 safe: multibyte sequences never contain bytes < 0x80):
+# \f \v \r -> newline; other C0 controls (except \t \n) and DEL dropped
+_BYTE_MAP = np.arange(256, dtype=np.uint8)
+_BYTE_MAP[[0x0B, 0x0C, 0x0D]] = 0x0A
+_BYTE_KEEP = np.ones(256, dtype=bool)
+_BYTE_KEEP[[c for c in range(32) if c not in (9, 10, 11, 12, 13)] + [0x7F]] = False
+
+
+def load_clean_bytes(text_path: Path):
+    """mmap a text file and clean it with numpy lookup tables.
+
+    Returns (cleaned uint8 array, newline offsets). Only one cleaned copy
+    is materialized; lines are decoded later, batch by batch.
+    """
+    with open(text_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            cleaned = np.empty(0, dtype=np.uint8)
+            return cleaned, cleaned.nonzero()[0]
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            buf = np.frombuffer(mm, dtype=np.uint8)
+            keep = _BYTE_KEEP[buf]
+            # Windows line endings: drop the \r of each \r\n
+            keep[:-1] &= ~((buf[:-1] == 0x0D) & (buf[1:] == 0x0A))
+            cleaned = _BYTE_MAP[buf[keep]]
+            del buf  # release the mmap export before close
+    return cleaned, np.flatnonzero(cleaned == 0x0A)
 
-    # Remove other control characters except newline and tab
-    # Keep printable chars + \n + \t
-    text = ''.join(char for char in text if char == '\n' or char == '\t' or (ord(char) >= 32 and ord(char) < 127) or ord(char) >= 128)
 
-    return text
+def decode_lines(cleaned, breaks, start: int, stop: int) -> list:
+    """Decode lines [start, stop) from the cleaned buffer in one call.
+
+    Courier is a latin-1 core font: anything outside it becomes '?'
+    here, so fpdf2 never has to reject a line.
+    """
+    lo = 0 if start == 0 else int(breaks[start - 1]) + 1
+    hi = int(breaks[stop - 1]) if stop - 1 < len(breaks) else len(cleaned)
+    text = cleaned[lo:hi].tobytes().decode('utf-8', errors='ignore')
+    text = text.encode('latin-1', errors='replace').decode('latin-1')
+    return text.split('\n')
 
 
 def convert_text_to_pdf(text_path: Path, pdf_path: Path) -> None:
     """Convert text file to PDF."""
     console.print(f"\n[cyan]Reading text file: {text_path.name}[/cyan]")
 
-    # Read text file
-    text = text_path.read_text(encoding='utf-8')
-    console.print(f"[green]Read {len(text):,} characters[/green]")
-
-    # Clean text
-    console.print(f"[cyan]Cleaning special characters...[/cyan]")
-    text = clean_text(text)
-    console.print(f"[green]Cleaned {len(text):,} characters[/green]")
+    # Read + clean text file (mmap, no full str copy)
+    cleaned, breaks = load_clean_bytes(text_path)
+    console.print(f"[green]Read and cleaned {len(cleaned):,} bytes[/green]")
 
     console.print(f"\n[cyan]Creating PDF: {pdf_path.name}[/cyan]")
 
     # Create PDF
     pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.set_auto_page_break(auto=True, margin=MARGIN_BOTTOM)
     pdf.add_page()
-    pdf.set_font("Courier", size=7)  # Smaller font to fit more content
+    pdf.set_font(FONT, size=FONT_SIZE)  # Smaller font to fit more content
 
     with Progress(
         SpinnerColumn(),
@@ -72,29 +84,13 @@ def convert_text_to_pdf(text_path: Path, pdf_path: Path) -> None:
     ) as progress:
         task = progress.add_task("Building PDF...", total=None)
 
-        lines = text.split('\n')
-        total_lines = len(lines)
-
-        for i, line in enumerate(lines, 1):
-            if i % 500 == 0:
-                progress.update(task, description=f"Processing {i:,}/{total_lines:,} lines")
-
-            if line.strip():
-                try:
-                    # Limit line length to prevent issues
-                    max_line_len = 150
-                    if len(line) > max_line_len:
-                        # Split long lines
-                        for j in range(0, len(line), max_line_len):
-                            chunk = line[j:j+max_line_len]
-                            pdf.multi_cell(0, 3.5, chunk, align='L')
-                    else:
-                        pdf.multi_cell(0, 3.5, line, align='L')
-                except Exception as e:
-                    # Skip problematic lines silently
-                    pass
-            else:
-                pdf.ln(3.5)
+        total_lines = len(breaks) + 1
+        cpl = chars_per_line(pdf.w - pdf.l_margin - pdf.r_margin, pdf.get_string_width("M"))
+
+        for start in range(0, total_lines, BATCH_LINES):
+            progress.update(task, description=f"Processing {start:,}/{total_lines:,} lines")
+            lines = decode_lines(cleaned, breaks, start, min(start + BATCH_LINES, total_lines))
+            emit_lines(pdf, wrap_lines(lines, cpl), LINE_H)
 
         progress.update(task, description="Saving PDF...")
         pdf.output(str(pdf_path))
@@ -15,8 +15,19 @@ import hashlib
 import json
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Optional, Set, Tuple
+
+try:
+    import orjson  # Rust JSON: nhanh hơn json stdlib nhiều lần
+except ImportError:  # pragma: no cover - fallback khi chưa cài orjson
+    orjson = None
+
+try:
+    import xxhash  # xxh3_128: khóa nội dung nhanh cho cache MD5 (không thay MD5)
+except ImportError:  # pragma: no cover - không có xxhash thì chỉ dùng (size, mtime)
+    xxhash = None
 
 
 def _load_env_from_ragon_root() -> None:
@@ -41,13 +52,73 @@ _load_env_from_ragon_root()
 
 
 def calculate_md5(file_path: Path) -> str:
-    """Tính MD5 hash của file PDF"""
+    """Tính MD5 hash của file PDF
+
+    Giữ MD5 vì tên folder hash (multi-train) là MD5.
+    Python 3.11+: hashlib.file_digest chạy vòng đọc trong C.
+    """
+    with open(file_path, "rb") as f:
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, "md5").hexdigest()
+        # Fallback: đọc theo chunks 1MB để xử lý file lớn
+        md5_hash = hashlib.md5()
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            md5_hash.update(chunk)
+        return md5_hash.hexdigest()
+
+
+def calculate_xxh3(file_path: Path) -> str:
+    """Tính xxh3_128 của file (nhanh hơn MD5 nhiều lần, chỉ dùng làm khóa cache)"""
+    h = xxhash.xxh3_128()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def calculate_md5_xxh3(file_path: Path) -> Tuple[str, str]:
+    """Tính (md5, xxh3_128) trong một lần đọc file"""
     md5_hash = hashlib.md5()
+    h = xxhash.xxh3_128()
     with open(file_path, "rb") as f:
-        # Đọc file theo chunks để xử lý file lớn
-        for chunk in iter(lambda: f.read(4096), b""):
+        for chunk in iter(lambda: f.read(1 << 20), b""):
             md5_hash.update(chunk)
-    return md5_hash.hexdigest()
+            h.update(chunk)
+    return md5_hash.hexdigest(), h.hexdigest()
+
+
+def _load_json(path: Path) -> Dict:
+    """Đọc JSON (orjson nếu có)"""
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _dump_json(path: Path, data: Dict) -> None:
+    """Ghi JSON indent 2, giữ nguyên unicode (orjson nếu có)"""
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def _get_json(path: Path, cache: Optional[Dict[Path, Dict]] = None) -> Dict:
+    """Đọc JSON qua cache (mỗi file chỉ parse 1 lần trong cả lượt chạy)"""
+    if cache is None:
+        return _load_json(path)
+    if path not in cache:
+        cache[path] = _load_json(path)
+    return cache[path]
+
+
+def _put_json(path: Path, data: Dict, dirty: Optional[Set[Path]] = None) -> None:
+    """Ghi JSON ngay, hoặc đánh dấu dirty để ghi 1 lần ở cuối"""
+    if dirty is None:
+        _dump_json(path, data)
+    else:
+        dirty.add(path)
 
 
 def find_hash_folder(base_dir: Path, file_hash: str) -> Optional[Path]:
@@ -58,36 +129,26 @@ def find_hash_folder(base_dir: Path, file_hash: str) -> Optional[Path]:
     return None
 
 
-def update_manifest_json(manifest_path: Path, old_filename: str, new_filename: str) -> bool:
+def update_manifest_json(manifest_path: Path, old_filename: str, new_filename: str,
+                         cache: Optional[Dict[Path, Dict]] = None,
+                         dirty: Optional[Set[Path]] = None) -> bool:
     """Update manifest.json với tên file mới"""
     try:
-        with open(manifest_path, 'r', encoding='utf-8') as f:
-            manifest = json.load(f)
+        manifest = _get_json(manifest_path, cache)
         
-        # Tìm entry cũ bằng hash matching
         files = manifest.get('files', {})
-        file_data = None
-        
-        # Tìm entry với hash khớp (vì tên file có thể đã thay đổi)
-        for filename, data in files.items():
-            # Nếu tìm thấy entry cũ
-            if filename == old_filename:
-                file_data = data
-                del files[filename]
-                break
         
-        if file_data is None:
+        if old_filename not in files:
             # Nếu không tìm thấy old_filename, có thể đã được update rồi
             # hoặc chưa có trong manifest
             return False
         
-        # Thêm entry mới với tên file mới
-        files[new_filename] = file_data
+        # Đổi key tại chỗ: O(1), không duyệt toàn bộ files
+        files[new_filename] = files.pop(old_filename)
         manifest['files'] = files
         
         # Ghi lại file
-        with open(manifest_path, 'w', encoding='utf-8') as f:
-            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        _put_json(manifest_path, manifest, dirty)
         
         return True
     except Exception as e:
@@ -95,18 +156,18 @@ def update_manifest_json(manifest_path: Path, old_filename: str, new_filename: s
         return False
 
 
-def update_metadata_json(metadata_path: Path, new_filename: str) -> bool:
+def update_metadata_json(metadata_path: Path, new_filename: str,
+                         cache: Optional[Dict[Path, Dict]] = None,
+                         dirty: Optional[Set[Path]] = None) -> bool:
     """Update metadata.json với tên file mới"""
     try:
-        with open(metadata_path, 'r', encoding='utf-8') as f:
-            metadata = json.load(f)
+        metadata = _get_json(metadata_path, cache)
         
         # Update filename
         metadata['filename'] = new_filename
         
         # Ghi lại file
-        with open(metadata_path, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, indent=2, ensure_ascii=False)
+        _put_json(metadata_path, metadata, dirty)
         
         return True
     except Exception as e:
@@ -114,24 +175,28 @@ def update_metadata_json(metadata_path: Path, new_filename: str) -> bool:
         return False
 
 
-def get_old_filename_from_metadata(metadata_path: Path) -> Optional[str]:
+def get_old_filename_from_metadata(metadata_path: Path,
+                                   cache: Optional[Dict[Path, Dict]] = None) -> Optional[str]:
     """Lấy tên file cũ từ metadata.json"""
     try:
-        with open(metadata_path, 'r', encoding='utf-8') as f:
-            metadata = json.load(f)
+        metadata = _get_json(metadata_path, cache)
         return metadata.get('filename')
     except Exception as e:
         print(f"❌ Lỗi đọc metadata.json: {e}")
         return None
 
 
-def process_pdf_file(pdf_path: Path, base_dir: Path) -> bool:
-    """Xử lý một file PDF"""
+def process_pdf_file(pdf_path: Path, base_dir: Path, file_hash: Optional[str] = None,
+                     cache: Optional[Dict[Path, Dict]] = None,
+                     dirty: Optional[Set[Path]] = None) -> bool:
+    """Xử lý một file PDF (file_hash: hash đã tính trước, nếu có;
+    cache/dirty: gom JSON theo folder hash, ghi 1 lần ở cuối)"""
     print(f"\n🔍 Xử lý: {pdf_path.name}")
     
     # 1. Tính MD5 hash
-    print("  ⏳ Đang tính MD5 hash...")
-    file_hash = calculate_md5(pdf_path)
+    if file_hash is None:
+        print("  ⏳ Đang tính MD5 hash...")
+        file_hash = calculate_md5(pdf_path)
     print(f"  ✓ Hash: {file_hash}")
     
     # 2. Tìm folder hash
@@ -150,7 +215,7 @@ def process_pdf_file(pdf_path: Path, base_dir: Path) -> bool:
         print(f"  ⚠️  Không tìm thấy metadata.json")
         return False
     
-    old_filename = get_old_filename_from_metadata(metadata_path)
+    old_filename = get_old_filename_from_metadata(metadata_path, cache)
     if not old_filename:
         print(f"  ⚠️  Không đọc được tên file cũ")
         return False
@@ -168,7 +233,7 @@ def process_pdf_file(pdf_path: Path, base_dir: Path) -> bool:
     # 4. Update manifest.json
     if manifest_path.exists():
         print("  ⏳ Đang update manifest.json...")
-        if update_manifest_json(manifest_path, old_filename, new_filename):
+        if update_manifest_json(manifest_path, old_filename, new_filename, cache, dirty):
             print("  ✓ Đã update manifest.json")
         else:
             print("  ⚠️  Không update được manifest.json")
@@ -177,7 +242,7 @@ def process_pdf_file(pdf_path: Path, base_dir: Path) -> bool:
     
     # 5. Update metadata.json
     print("  ⏳ Đang update metadata.json...")
-    if update_metadata_json(metadata_path, new_filename):
+    if update_metadata_json(metadata_path, new_filename, cache, dirty):
         print("  ✓ Đã update metadata.json")
     else:
         print("  ⚠️  Không update được metadata.json")
@@ -187,6 +252,63 @@ def process_pdf_file(pdf_path: Path, base_dir: Path) -> bool:
     return True
 
 
+# Sidecar cache {tên file: [size, mtime_ns, md5(, xxh3)]} đặt trong base_dir
+MD5_CACHE_NAME = ".md5_cache.json"
+
+
+def _load_md5_cache(base_dir: Path) -> Dict[str, list]:
+    """Đọc .md5_cache.json (rỗng nếu chưa có hoặc hỏng)"""
+    cache_path = base_dir / MD5_CACHE_NAME
+    if not cache_path.exists():
+        return {}
+    try:
+        return _load_json(cache_path)
+    except Exception:
+        return {}
+
+
+def _build_xxh3_index(md5_cache: Dict[str, list]) -> Dict[str, str]:
+    """{"size:xxh3": md5} để nhận ra file đã biết dù bị đổi tên / đổi mtime"""
+    return {f"{e[0]}:{e[3]}": e[2] for e in md5_cache.values() if len(e) > 3}
+
+
+def _cached_md5(pdf_path: Path, md5_cache: Dict[str, list],
+                xxh3_index: Optional[Dict[str, str]] = None) -> list:
+    """Entry cache [size, mtime_ns, md5(, xxh3)] cho file
+
+    (size, mtime_ns) khớp thì chỉ tốn 1 lần stat. Không khớp mà có xxhash:
+    tra xxh3 trước, chỉ tính MD5 khi nội dung thật sự mới. Index rỗng
+    (lần chạy đầu) thì không có gì để tra: tính cả hai trong một lần đọc.
+    """
+    st = pdf_path.stat()
+    key = [st.st_size, st.st_mtime_ns]
+    entry = md5_cache.get(pdf_path.name)
+    if entry and entry[:2] == key:
+        return entry
+    if xxhash is None:
+        return key + [calculate_md5(pdf_path)]
+    if not xxh3_index:
+        md5, content_key = calculate_md5_xxh3(pdf_path)
+        return key + [md5, content_key]
+    content_key = calculate_xxh3(pdf_path)
+    md5 = xxh3_index.get(f"{st.st_size}:{content_key}") or calculate_md5(pdf_path)
+    return key + [md5, content_key]
+
+
+def _md5_or_error(pdf_path: Path, md5_cache: Optional[Dict[str, list]] = None,
+                  xxh3_index: Optional[Dict[str, str]] = None):
+    """calculate_md5 cho thread pool: trả về Exception thay vì raise
+
+    Có md5_cache thì trả về cả entry cache thay vì chỉ MD5.
+    """
+    try:
+        if md5_cache is not None:
+            return _cached_md5(pdf_path, md5_cache, xxh3_index)
+        return calculate_md5(pdf_path)
+    except Exception as e:
+        return e
+
+
 def process_all_pdfs(base_dir: Path):
     """Xử lý tất cả file PDF trong thư mục"""
     # Support both .pdf and .PDF extensions
@@ -202,9 +324,38 @@ def process_all_pdfs(base_dir: Path):
     skip_count = 0
     error_count = 0
     
-    for pdf_path in pdf_files:
+    # Hash song song (IO-bound, hashlib nhả GIL); update JSON tuần tự bên dưới
+    print("⏳ Đang tính MD5 hash...")
+    md5_cache = _load_md5_cache(base_dir)
+    xxh3_index = _build_xxh3_index(md5_cache)
+    n = len(pdf_files)
+    with ThreadPoolExecutor(max_workers=min(8, n)) as ex:
+        entries = list(ex.map(_md5_or_error, pdf_files, [md5_cache] * n, [xxh3_index] * n))
+    
+    # Ghi lại cache chỉ với các file hiện có (file đã xóa tự rơi khỏi cache)
+    new_md5_cache: Dict[str, list] = {}
+    hashes = []
+    for pdf_path, entry in zip(pdf_files, entries):
+        if isinstance(entry, Exception):
+            hashes.append(entry)
+        else:
+            new_md5_cache[pdf_path.name] = entry
+            hashes.append(entry[2])
+    if new_md5_cache != md5_cache:
         try:
-            result = process_pdf_file(pdf_path, base_dir)
+            _dump_json(base_dir / MD5_CACHE_NAME, new_md5_cache)
+        except Exception as e:
+            print(f"⚠️  Không ghi được {MD5_CACHE_NAME}: {e}")
+    
+    # Mỗi manifest/metadata chỉ đọc 1 lần và ghi 1 lần cho cả lượt chạy
+    json_cache: Dict[Path, Dict] = {}
+    dirty: Set[Path] = set()
+    
+    for pdf_path, file_hash in zip(pdf_files, hashes):
+        try:
+            if isinstance(file_hash, Exception):
+                raise file_hash
+            result = process_pdf_file(pdf_path, base_dir, file_hash, json_cache, dirty)
             if result:
                 success_count += 1
             else:
@@ -213,6 +364,15 @@ def process_all_pdfs(base_dir: Path):
             print(f"❌ Lỗi xử lý {pdf_path.name}: {e}")
             error_count += 1
     
+    if dirty:
+        print(f"\n💾 Đang ghi {len(dirty)} file JSON...")
+    for json_path in dirty:
+        try:
+            _dump_json(json_path, json_cache[json_path])
+        except Exception as e:
+            print(f"❌ Lỗi ghi {json_path}: {e}")
+            error_count += 1
+    
     print(f"\n{'='*60}")
     print(f"📊 Tổng kết:")
     print(f"  ✅ Thành công: {success_count}")
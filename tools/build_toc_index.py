@@ -12,7 +12,9 @@ Strategy (coarse → fine):
 Artifacts:
 - DKM-PDFs/toc_manifest.json : metadata & cached MD5 to skip unchanged files.
 - DKM-PDFs/<md5hash>/index.md : human-readable TOC dump (raw).
-- DKM-PDFs/0-index.pdf : merged PDF containing all TOCs.
+- DKM-PDFs/<md5hash>/pages.jsonl : extracted page texts, so cached runs skip text extraction.
+- DKM-PDFs/<md5hash>/toc.pdf : that document's TOC page(s), re-rendered only when it changes.
+- DKM-PDFs/0-index.pdf : merged PDF containing all TOCs (page-copied from the toc.pdf files).
 
 Idempotent & incremental: only re-extract when file MD5 changed or missing entry.
 """
@@ -22,7 +24,20 @@ from pathlib import Path
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
 
-from pypdf import PdfReader
+try:
+    import pymupdf as fitz  # PyMuPDF: C-backed text/outline extraction, much faster than pypdf
+    PdfReader = None
+except ImportError:
+    fitz = None
+    from pypdf import PdfReader
+try:
+    import orjson  # faster manifest (de)serialization, writes UTF-8 bytes directly
+except ImportError:
+    orjson = None
+try:
+    import re2 as toc_re  # google-re2: linear-time DFA matching, no backtracking blowups
+except ImportError:
+    toc_re = re
 from fpdf import FPDF
 
 # Load environment from .env (portable)
@@ -58,11 +73,24 @@ if VENV_PY and os.path.exists(VENV_PY) and os.path.realpath(sys.executable) != o
 DKM_PDF_PATH = os.getenv("DKM_PDF_PATH", "")
 ROOT = Path(DKM_PDF_PATH) if DKM_PDF_PATH else Path(__file__).resolve().parent.parent / "DKM-PDFs"
 MANIFEST_PATH = ROOT / "toc_manifest.json"
+MERGED_PDF_NAME = "0-index.pdf"
+PAGES_CACHE_NAME = "pages.jsonl"  # extracted page texts, cached in DKM-PDFs/<md5hash>/
+TOC_PDF_NAME = "toc.pdf"  # per-document TOC page(s), cached in DKM-PDFs/<md5hash>/
 PAGES_SCAN = 30  # pages to scan for regex extraction (expanded from 12)
 
-dot_leader_re = re.compile(r"^(.{4,}?)(?:\.{2,}|\s)\s*(\d{1,4})$")
-section_number_re = re.compile(r"^(\d+(?:\.\d+)*)([ \t]+)(.{2,}?)[ \t]{2,}(\d{1,4})$")
-trailing_page_re = re.compile(r"^(.{4,}?)[ \t]{3,}(\d{1,4})$")
+# One alternation, tried in priority order: dot leader | section number | trailing page.
+# Each branch ends in its own page group, so m.lastgroup says which one matched.
+# Compiled with RE2 when available (no backrefs/lookarounds used, so it is drop-in);
+# RE2's \s is ASCII-only, so spell out Python's Unicode whitespace for it.
+_WS = r"\s" if toc_re is re else r"[\s\x0b\x1c-\x1f\x85\p{Z}]"
+TOC_LINE_RE = toc_re.compile(
+    r"^(?:"
+    rf"(?P<dl_t>.{{4,}}?)(?:\.{{2,}}|{_WS}){_WS}*(?P<dl_p>\d{{1,4}})"
+    r"|(?P<sn_num>\d+(?:\.\d+)*)[ \t]+(?P<sn_t>.{2,}?)[ \t]{2,}(?P<sn_p>\d{1,4})"
+    r"|(?P<tp_t>.{4,}?)[ \t]{3,}(?P<tp_p>\d{1,4})"
+    r")$"
+)
+trailing_digits_re = toc_re.compile(r"\d{3,}$")
 
 @dataclass
 class TocLine:
@@ -74,10 +102,112 @@ class TocLine:
         return {"title": self.title, "page": self.page, "source": self.source}
 
 
+class PdfDoc:
+    """Thin adapter over PyMuPDF (pypdf fallback): page count, page text, flat outline.
+
+    Built from a pages.jsonl cache (see from_pages_cache), the PDF itself is only
+    opened if a page outside the cache is asked for.
+    """
+
+    def __init__(self, pdf_path: Path, texts: Optional[Dict[int, str]] = None, page_count: Optional[int] = None):
+        self._path = pdf_path
+        self._texts: Dict[int, str] = dict(texts) if texts else {}  # page index -> extracted text (each page parsed once)
+        self._doc = None
+        self._reader = None
+        self.extracted = False  # True once any page text came from the PDF (cache worth rewriting)
+        self.page_count = page_count
+        if page_count is None:
+            self._open()
+
+    def _open(self):
+        if self._doc is not None or self._reader is not None:
+            return
+        if fitz is not None:
+            self._doc = fitz.open(str(self._path))
+            self.page_count = self._doc.page_count
+        else:
+            self._reader = PdfReader(str(self._path))
+            self.page_count = len(self._reader.pages)
+
+    @classmethod
+    def from_pages_cache(cls, pdf_path: Path, cache_path: Path) -> Optional["PdfDoc"]:
+        """PdfDoc backed by a pages.jsonl written by save_pages_cache (None if missing/corrupt)."""
+        try:
+            with cache_path.open('r', encoding='utf-8') as f:
+                header = json.loads(f.readline())
+                texts = {}
+                for line in f:
+                    rec = json.loads(line)
+                    texts[rec['i']] = rec['text']
+            return cls(pdf_path, texts, int(header['page_count']))
+        except Exception:
+            return None
+
+    def save_pages_cache(self, cache_path: Path):
+        """Write {"page_count"} then one {"i", "text"} line per extracted page."""
+        with cache_path.open('w', encoding='utf-8') as f:
+            f.write(json.dumps({"page_count": self.page_count}) + '\n')
+            for i in sorted(self._texts):
+                f.write(json.dumps({"i": i, "text": self._texts[i]}, ensure_ascii=False) + '\n')
+
+    def page_text(self, i: int) -> str:
+        """Text of page i, memoized: regex scan, TOC detection and page dump share one extraction.
+
+        Never raises: a page that fails to extract (malformed stream) reads as '' and is
+        not retried, so callers need no per-page try/except.
+        """
+        text = self._texts.get(i)
+        if text is None:
+            text = self._texts[i] = self._safe_text(i)
+        return text
+
+    def _safe_text(self, i: int) -> str:
+        try:
+            self._open()
+            self.extracted = True
+            if self._doc is not None:
+                return self._doc.load_page(i).get_text("text") or ''
+            return self._reader.pages[i].extract_text() or ''
+        except Exception:
+            return ''
+
+    def outline(self) -> List[tuple[str, Optional[int]]]:
+        """Flat list of (title, 1-based page or None)."""
+        self._open()
+        if self._doc is not None:
+            # get_toc is already flat: [level, title, page] with page < 1 when unresolved
+            return [(title, page if page > 0 else None) for _level, title, page in self._doc.get_toc(simple=True)]
+        reader = self._reader
+        out: List[tuple[str, Optional[int]]] = []
+        outlines = getattr(reader, 'outlines', None)
+        if not outlines:
+            return out
+        # outlines can be nested; flatten with an explicit stack (no recursion limit).
+        # Items are pushed reversed so popping keeps document order.
+        dest_page = reader.get_destination_page_number
+        stack = list(reversed(outlines))
+        while stack:
+            it = stack.pop()
+            if isinstance(it, list):
+                stack.extend(reversed(it))
+                continue
+            title = getattr(it, 'title', '') or str(it)
+            try:
+                page_obj = dest_page(it)  # type: ignore
+            except Exception:
+                page_obj = None
+            out.append((title, page_obj + 1 if page_obj is not None else None))
+        return out
+
+
 def md5_file(p: Path) -> str:
-    h = hashlib.md5()
+    # Stays MD5: the hash doubles as the DKM-PDFs/<md5hash>/ folder name
     with p.open('rb') as f:
-        for chunk in iter(lambda: f.read(8192), b''):
+        if hasattr(hashlib, 'file_digest'):
+            # Python 3.11+: read loop runs in C
+            return hashlib.file_digest(f, 'md5').hexdigest()
+        h = hashlib.md5()
+        for chunk in iter(lambda: f.read(1 << 20), b''):
             h.update(chunk)
     return h.hexdigest()
 
@@ -85,6 +215,8 @@ def md5_file(p: Path) -> str:
 def load_manifest() -> Dict[str, Any]:
     if MANIFEST_PATH.exists():
         try:
+            if orjson is not None:
+                return orjson.loads(MANIFEST_PATH.read_bytes())
             return json.loads(MANIFEST_PATH.read_text("utf-8"))
         except Exception:
             pass
@@ -93,41 +225,25 @@ def load_manifest() -> Dict[str, Any]:
 
 def save_manifest(data: Dict[str, Any]):
     data["generated_at"] = time.strftime('%Y-%m-%dT%H:%M:%S')
+    if orjson is not None:
+        MANIFEST_PATH.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        return
     MANIFEST_PATH.write_text(json.dumps(data, ensure_ascii=False, indent=2), "utf-8")
 
 
-def extract_outline(reader: PdfReader) -> List[TocLine]:
-    lines: List[TocLine] = []
+def extract_outline(doc: PdfDoc) -> List[TocLine]:
     try:
-        outlines = getattr(reader, 'outlines', None)
-        if not outlines:
-            return []
-        # outlines can be nested; flatten
-        def walk(items):
-            for it in items:
-                if isinstance(it, list):
-                    yield from walk(it)
-                else:
-                    title = getattr(it, 'title', '') or str(it)
-                    try:
-                        page_obj = reader.get_destination_page_number(it)  # type: ignore
-                    except Exception:
-                        page_obj = None
-                    lines.append(TocLine(title=title.strip(), page=page_obj + 1 if page_obj is not None else None, source="outline"))
-        walk(outlines)
+        return [TocLine(title=title.strip(), page=page, source="outline") for title, page in doc.outline()]
     except Exception:
         return []
-    return lines
 
 
-def extract_regex(reader: PdfReader, pages: int) -> List[TocLine]:
+def extract_regex(doc: PdfDoc, pages: int) -> List[TocLine]:
     lines: List[TocLine] = []
-    max_pages = min(pages, len(reader.pages))
+    seen: set[tuple[str, Optional[int]]] = set()  # dedupe by (title, page) while collecting
+    max_pages = min(pages, doc.page_count)
     for i in range(max_pages):
-        try:
-            text = reader.pages[i].extract_text() or ''
-        except Exception:
-            continue
+        text = doc.page_text(i)
         for raw_line in text.splitlines():
             l = raw_line.strip()
             if not l or len(l) < 4:
@@ -135,53 +251,54 @@ def extract_regex(reader: PdfReader, pages: int) -> List[TocLine]:
             # Avoid huge paragraphs
             if len(l) > 180:
                 continue
-            m = dot_leader_re.match(l)
-            if m:
-                title, pg = m.groups()
-                lines.append(TocLine(title=title.strip(), page=int(pg), source="regex"))
-                continue
-            m = section_number_re.match(l)
-            if m:
-                num, _, rest, pg = m.groups()
-                title = f"{num} {rest.strip()}"
-                lines.append(TocLine(title=title.strip(), page=int(pg), source="regex"))
+            m = TOC_LINE_RE.match(l)
+            if not m:
                 continue
-            m = trailing_page_re.match(l)
-            if m:
-                title, pg = m.groups()
+            kind = m.lastgroup
+            if kind == 'dl_p':
+                title, pg = m.group('dl_t', 'dl_p')
+            elif kind == 'sn_p':
+                title, pg = f"{m.group('sn_num')} {m.group('sn_t').strip()}", m.group('sn_p')
+            else:
+                title, pg = m.group('tp_t', 'tp_p')
                 # Heuristic: ignore if title ends with too many digits (likely false positive)
-                if re.search(r"\d{3,}$", title):
+                if trailing_digits_re.search(title):
                     continue
-                lines.append(TocLine(title=title.strip(), page=int(pg), source="regex"))
-    # Deduplicate by (title,page)
-    uniq = {}
-    for tl in lines:
-        key = (tl.title, tl.page)
-        if key not in uniq:
-            uniq[key] = tl
-    return list(uniq.values())
+            key = (title.strip(), int(pg))
+            if key in seen:
+                continue
+            seen.add(key)
+            lines.append(TocLine(title=key[0], page=key[1], source="regex"))
+    return lines
 
 
-def detect_toc_pages(reader: PdfReader, pages: int) -> List[int]:
+def detect_toc_pages(doc: PdfDoc, pages: int) -> List[int]:
     """Detect pages likely containing TOC; return zero-based indices and add one extra page after the last block."""
-    max_pages = min(pages, len(reader.pages))
+    max_pages = min(pages, doc.page_count)
     toc_pages: List[int] = []
+    misses = 0  # consecutive non-TOC pages since the last hit
     for i in range(max_pages):
-        try:
-            text = reader.pages[i].extract_text() or ''
-        except Exception:
-            continue
+        # Past the TOC block: two non-matching pages in a row end the scan
+        if toc_pages and misses >= 2:
+            break
+        text = doc.page_text(i)
         low = text.lower()
         keyword_hit = ("mục lục" in low) or ("table of contents" in low) or ("contents" in low)
         matches = 0
-        for raw_line in text.splitlines():
-            l = raw_line.strip()
-            if not l or len(l) < 4 or len(l) > 180:
-                continue
-            if dot_leader_re.match(l) or section_number_re.match(l) or trailing_page_re.match(l):
-                matches += 1
+        if not keyword_hit:
+            for raw_line in text.splitlines():
+                l = raw_line.strip()
+                if not l or len(l) < 4 or len(l) > 180:
+                    continue
+                if TOC_LINE_RE.match(l):
+                    matches += 1
+                    if matches >= 3:
+                        break
         if keyword_hit or matches >= 3:
             toc_pages.append(i)
+            misses = 0
+        else:
+            misses += 1
     # Add spillover: include the page right after the last detected contiguous block
     if toc_pages:
         extra: List[int] = []
@@ -190,29 +307,28 @@ def detect_toc_pages(reader: PdfReader, pages: int) -> List[int]:
             if last is not None and idx != last + 1:
                 # new block; add spillover for previous block
                 spill = last + 1
-                if spill < len(reader.pages):
+                if spill < doc.page_count:
                     extra.append(spill)
             last = idx
         # spill for final block
         if last is not None:
             spill = last + 1
-            if spill < len(reader.pages):
+            if spill < doc.page_count:
                 extra.append(spill)
         toc_pages = sorted(set(toc_pages + extra))
     return toc_pages
 
 
-def collect_page_texts(reader: PdfReader, page_indices: List[int]) -> List[tuple[int, str]]:
+def collect_page_texts(doc: PdfDoc, page_indices: List[int]) -> List[tuple[int, str]]:
     out: List[tuple[int, str]] = []
     for i in sorted(set(page_indices)):
-        try:
-            txt = reader.pages[i].extract_text() or ''
-        except Exception:
-            txt = ''
-        out.append((i, txt))
+        out.append((i, doc.page_text(i)))
     return out
 
 
+_MD_CELL_ESCAPE = str.maketrans({'|': '\\|', '\n': ' ', '\r': ' '})
+
+
 def write_index_md(hash_id: str, pdf_name: str, toc: List[TocLine], page_texts: Optional[List[tuple[int, str]]] = None):
     folder = ROOT / hash_id
     folder.mkdir(exist_ok=True)
@@ -227,8 +343,8 @@ def write_index_md(hash_id: str, pdf_name: str, toc: List[TocLine], page_texts:
     ]
     for idx, tl in enumerate(toc, 1):
         page = tl.page if tl.page is not None else ''
-        # Escape pipe
-        title = tl.title.replace('|', '\\|')
+        # Escape pipe; embedded newlines would break the table row
+        title = tl.title.translate(_MD_CELL_ESCAPE)
         lines.append(f"| {idx} | {page} | {tl.source} | {title} |")
     if page_texts:
         lines.append("")
@@ -238,42 +354,189 @@ def write_index_md(hash_id: str, pdf_name: str, toc: List[TocLine], page_texts:
             lines.append(f"### Page {pg_idx + 1}")
             lines.append("")
             lines.append(txt or "")
-    md_path.write_text('\n'.join(lines), 'utf-8')
+    # Stream rows out instead of materializing one joined (possibly MB-sized) string
+    with md_path.open('w', encoding='utf-8', buffering=1 << 16) as out:
+        out.writelines(line + '\n' for line in lines)
 
 
-def build_merged_pdf(entries: List[Dict[str, Any]], output: Path):
+def render_toc_pdf(entry: Dict[str, Any]) -> Optional[bytes]:
+    """Render one document's TOC page(s) as a standalone PDF."""
     pdf = FPDF()
     pdf.set_auto_page_break(auto=True, margin=12)
+    pdf.add_page()
+    pdf.set_font('Helvetica', 'B', 14)
+    try:
+        pdf.cell(0, 10, entry['filename'], ln=1)
+        pdf.set_font('Helvetica', '', 10)
+        pdf.cell(0, 6, f"Hash: {entry['hash']} | Lines: {len(entry['toc_lines'])} | Strategy: {entry['strategy']}", ln=1)
+        pdf.ln(2)
+        pdf.set_font('Helvetica', '', 9)
+        for i, tl in enumerate(entry['toc_lines'], 1):
+            page = tl.get('page') or ''
+            source = tl.get('source')
+            line = f"{i:03d}. [{page}] ({source}) {tl['title']}"
+            # multi_cell wraps by the full cell width itself; return to the left margin after
+            pdf.multi_cell(0, 5, line, new_x="LMARGIN", new_y="NEXT")
+    except Exception:
+        # Keep what rendered so far rather than aborting the whole build
+        pass
+    try:
+        return bytes(pdf.output())
+    except Exception:
+        return None
+
+
+def concat_pdfs(parts: List[Any], output: Path):
+    """Concatenate PDFs (paths or raw bytes) by copying pages, no re-rendering."""
+    if fitz is not None:
+        merged = fitz.open()
+        for part in parts:
+            src = fitz.open(stream=part, filetype='pdf') if isinstance(part, bytes) else fitz.open(str(part))
+            merged.insert_pdf(src)
+            src.close()
+        merged.save(str(output))
+        merged.close()
+        return
+    import io
+    from pypdf import PdfWriter
+    writer = PdfWriter()
+    for part in parts:
+        writer.append(io.BytesIO(part) if isinstance(part, bytes) else str(part))
+    writer.write(str(output))
+
+
+def build_merged_pdf(entries: List[Dict[str, Any]], output: Path, changed_hashes: Optional[set] = None):
+    """Merge per-document TOC PDFs (ROOT/<hash>/toc.pdf) into output.
+
+    A document's toc.pdf is re-rendered only when its hash is in changed_hashes
+    (None = all) or the file is missing; everything else is page-copied as is.
+    """
+    parts: List[Any] = []
+    seen = set()
     for entry in entries:
-        pdf.add_page()
-        pdf.set_font('Helvetica', 'B', 14)
-        try:
-            pdf.cell(0, 10, entry['filename'], ln=1)
-            pdf.set_font('Helvetica', '', 10)
-            pdf.cell(0, 6, f"Hash: {entry['hash']} | Lines: {len(entry['toc_lines'])} | Strategy: {entry['strategy']}", ln=1)
-            pdf.ln(2)
-            pdf.set_font('Helvetica', '', 9)
-            for i, tl in enumerate(entry['toc_lines'], 1):
-                page = tl.get('page') or ''
-                source = tl.get('source')
-                line = f"{i:03d}. [{page}] ({source}) {tl['title']}"
-                # Wrap manually with safe width
-                max_w = 150
-                while len(line) > 0:
-                    segment = line[:max_w]
-                    line = line[max_w:]
-                    pdf.multi_cell(0, 5, segment)
-        except Exception:
-            # Skip problematic entries to avoid aborting the whole build
+        file_hash = entry['hash']
+        if file_hash in seen:
+            # Same content under another filename: the header differs, render in memory
+            data = render_toc_pdf(entry)
+            if data is not None:
+                parts.append(data)
             continue
+        seen.add(file_hash)
+        sub_pdf = ROOT / file_hash / TOC_PDF_NAME
+        if changed_hashes is None or file_hash in changed_hashes or not sub_pdf.exists():
+            data = render_toc_pdf(entry)
+            if data is None:
+                continue
+            sub_pdf.write_bytes(data)
+        parts.append(sub_pdf)
+    if not parts:
+        return
     try:
-        pdf.output(str(output))
+        concat_pdfs(parts, output)
     except Exception:
         pass
 
 
+def _save_pages_cache(doc: PdfDoc, file_hash: str):
+    try:
+        doc.save_pages_cache(ROOT / file_hash / PAGES_CACHE_NAME)
+    except Exception:
+        pass
+
+
+def process_pdf(pdf_path: Path, cached_entry: Optional[Dict[str, Any]], force_rebuild: bool, pages: int = PAGES_SCAN) -> Dict[str, Any]:
+    """Process one PDF (runs in a worker process).
+
+    Returns {'entry': fresh manifest entry or None, 'processed': merged-PDF entry or None, 'log': str}.
+    """
+    result: Dict[str, Any] = {'entry': None, 'processed': None, 'log': ''}
+    try:
+        file_hash = md5_file(pdf_path)
+    except Exception as e:
+        result['log'] = f"[SKIP] {pdf_path.name}: hash error {e}"
+        return result
+    entry = cached_entry
+    if entry and entry.get('hash') == file_hash and not force_rebuild:
+        # Reuse cached lines but regenerate index.md with full TOC pages content;
+        # page texts come from pages.jsonl when present (no PDF parsing at all)
+        doc = PdfDoc.from_pages_cache(pdf_path, ROOT / file_hash / PAGES_CACHE_NAME)
+        if doc is None:
+            try:
+                doc = PdfDoc(pdf_path)
+            except Exception:
+                doc = None
+        toc_dicts = entry.get('toc_lines', [])
+        toc_objs = [TocLine(title=d.get('title',''), page=d.get('page'), source=d.get('source','cached')) for d in toc_dicts]
+        page_texts = None
+        if doc is not None:
+            toc_pages = detect_toc_pages(doc, pages)
+            page_texts = collect_page_texts(doc, toc_pages)
+        write_index_md(file_hash, pdf_path.name, toc_objs, page_texts)
+        if doc is not None and doc.extracted:
+            _save_pages_cache(doc, file_hash)
+        # Cleanup old timestamped index files
+        for extra in (ROOT / file_hash).glob('index-*.md'):
+            if extra.name != 'index.md':
+                try: extra.unlink()
+                except Exception: pass
+        # Reuse cached lines
+        result['processed'] = {
+            'filename': pdf_path.name,
+            'hash': file_hash,
+            'toc_lines': entry['toc_lines'],
+            'strategy': entry.get('extraction_strategy', 'cached')
+        }
+        return result
+    # Extract fresh
+    try:
+        doc = PdfDoc(pdf_path)
+    except Exception as e:
+        result['log'] = f"[SKIP] {pdf_path.name}: open error {e}"
+        return result
+    outline_lines = extract_outline(doc)
+    regex_lines = extract_regex(doc, pages)
+    combined: List[TocLine] = []
+    used_sources = []
+    if outline_lines:
+        combined.extend(outline_lines)
+        used_sources.append('outline')
+    if regex_lines:
+        combined.extend(regex_lines)
+        used_sources.append('regex')
+    # Fallback: if nothing, store empty placeholder
+    extraction_strategy = '+'.join(used_sources) if used_sources else 'none'
+    dict_lines = [tl.to_dict() for tl in combined]
+    result['entry'] = {
+        'hash': file_hash,
+        'updated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'outline_used': bool(outline_lines),
+        'toc_lines': dict_lines,
+        'raw_sample_pages': list(range(1, min(pages, doc.page_count) + 1)),
+        'extraction_strategy': extraction_strategy,
+        'version': 1
+    }
+    toc_pages = detect_toc_pages(doc, pages)
+    page_texts = collect_page_texts(doc, toc_pages)
+    write_index_md(file_hash, pdf_path.name, combined, page_texts)
+    _save_pages_cache(doc, file_hash)
+    # Cleanup old timestamped index files
+    for extra in (ROOT / file_hash).glob('index-*.md'):
+        if extra.name != 'index.md':
+            try: extra.unlink()
+            except Exception: pass
+    result['processed'] = {
+        'filename': pdf_path.name,
+        'hash': file_hash,
+        'toc_lines': dict_lines,
+        'strategy': extraction_strategy
+    }
+    result['log'] = f"[OK] {pdf_path.name}: {len(dict_lines)} lines ({extraction_strategy}); TOC pages: {','.join(str(p+1) for p in toc_pages) if toc_pages else 'none'}"
+    return result
+
+
 def main():
     import argparse
+    from concurrent.futures import ProcessPoolExecutor
     parser = argparse.ArgumentParser(description="Build TOC index artifacts")
     parser.add_argument('--force-rebuild', action='store_true', help='Force re-extraction even if hash unchanged')
     parser.add_argument('--pages', type=int, default=30, help='Number of leading pages to scan for TOC')
@@ -285,90 +548,45 @@ def main():
     pdf_entries = manifest.setdefault('pdfs', {})
     changed: List[Dict[str, Any]] = []
     all_processed_entries: List[Dict[str, Any]] = []
-    pdf_files = sorted([p for p in ROOT.glob('*.pdf')] + [p for p in ROOT.glob('*.PDF')])
+    # One directory pass (instead of a glob per extension case).
+    # Our own output is regenerated (new timestamp, new hash) every run: never index it
+    try:
+        with os.scandir(ROOT) as it:
+            pdf_files = sorted(
+                (Path(e.path) for e in it
+                 if e.name.lower().endswith('.pdf') and e.name != MERGED_PDF_NAME and e.is_file()),
+                key=lambda p: p.name,
+            )
+    except FileNotFoundError:
+        pdf_files = []
     if not pdf_files:
         print("No PDFs found in DKM-PDFs root.")
         return
-    for pdf_path in pdf_files:
-        try:
-            file_hash = md5_file(pdf_path)
-        except Exception as e:
-            print(f"[SKIP] {pdf_path.name}: hash error {e}")
-            continue
-        entry = pdf_entries.get(pdf_path.name)
-        if entry and entry.get('hash') == file_hash and not force_rebuild:
-            # Reuse cached lines but regenerate index.md with full TOC pages content
-            try:
-                reader = PdfReader(str(pdf_path))
-            except Exception:
-                reader = None
-            toc_dicts = entry.get('toc_lines', [])
-            toc_objs = [TocLine(title=d.get('title',''), page=d.get('page'), source=d.get('source','cached')) for d in toc_dicts]
-            page_texts = None
-            if reader is not None:
-                toc_pages = detect_toc_pages(reader, PAGES_SCAN)
-                page_texts = collect_page_texts(reader, toc_pages)
-            write_index_md(file_hash, pdf_path.name, toc_objs, page_texts)
-            # Cleanup old timestamped index files
-            for extra in (ROOT / file_hash).glob('index-*.md'):
-                if extra.name != 'index.md':
-                    try: extra.unlink()
-                    except Exception: pass
-            # Reuse cached lines
-            all_processed_entries.append({
-                'filename': pdf_path.name,
-                'hash': file_hash,
-                'toc_lines': entry['toc_lines'],
-                'strategy': entry.get('extraction_strategy', 'cached')
-            })
-            continue
-        # Extract fresh
-        try:
-            reader = PdfReader(str(pdf_path))
-        except Exception as e:
-            print(f"[SKIP] {pdf_path.name}: open error {e}")
-            continue
-        outline_lines = extract_outline(reader)
-        regex_lines = extract_regex(reader, PAGES_SCAN)
-        combined: List[TocLine] = []
-        used_sources = []
-        if outline_lines:
-            combined.extend(outline_lines)
-            used_sources.append('outline')
-        if regex_lines:
-            combined.extend(regex_lines)
-            used_sources.append('regex')
-        # Fallback: if nothing, store empty placeholder
-        extraction_strategy = '+'.join(used_sources) if used_sources else 'none'
-        dict_lines = [tl.to_dict() for tl in combined]
-        pdf_entries[pdf_path.name] = {
-            'hash': file_hash,
-            'updated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
-            'outline_used': bool(outline_lines),
-            'toc_lines': dict_lines,
-            'raw_sample_pages': list(range(1, min(PAGES_SCAN, len(reader.pages)) + 1)),
-            'extraction_strategy': extraction_strategy,
-            'version': 1
-        }
-        toc_pages = detect_toc_pages(reader, PAGES_SCAN)
-        page_texts = collect_page_texts(reader, toc_pages)
-        write_index_md(file_hash, pdf_path.name, combined, page_texts)
-        # Cleanup old timestamped index files
-        for extra in (ROOT / file_hash).glob('index-*.md'):
-            if extra.name != 'index.md':
-                try: extra.unlink()
-                except Exception: pass
-        all_processed_entries.append({
-            'filename': pdf_path.name,
-            'hash': file_hash,
-            'toc_lines': dict_lines,
-            'strategy': extraction_strategy
-        })
-        changed.append(pdf_entries[pdf_path.name])
-        print(f"[OK] {pdf_path.name}: {len(dict_lines)} lines ({extraction_strategy}); TOC pages: {','.join(str(p+1) for p in toc_pages) if toc_pages else 'none'}")
-    save_manifest(manifest)
+    # Files are independent: extract in parallel, merge into the manifest here (single writer)
+    n = len(pdf_files)
+    with ProcessPoolExecutor(max_workers=min(n, os.cpu_count() or 1)) as ex:
+        results = ex.map(
+            process_pdf,
+            pdf_files,
+            [pdf_entries.get(p.name) for p in pdf_files],
+            [force_rebuild] * n,
+            [PAGES_SCAN] * n,
+        )
+        for pdf_path, res in zip(pdf_files, results):
+            if res['log']:
+                print(res['log'])
+            if res['entry'] is not None:
+                pdf_entries[pdf_path.name] = res['entry']
+                changed.append(res['entry'])
+            if res['processed'] is not None:
+                all_processed_entries.append(res['processed'])
+    # Nothing re-extracted: the manifest on disk is already current
+    if changed or force_rebuild:
+        save_manifest(manifest)
     try:
-        build_merged_pdf(all_processed_entries, ROOT / '0-index.pdf')
+        # Only documents re-extracted this run get their toc.pdf re-rendered
+        changed_hashes = None if force_rebuild else {e['hash'] for e in changed}
+        build_merged_pdf(all_processed_entries, ROOT / MERGED_PDF_NAME, changed_hashes)
         print(f"Generated 0-index.pdf with {len(all_processed_entries)} documents.")
     except Exception:
         print("Merged PDF generation skipped due to rendering errors.")
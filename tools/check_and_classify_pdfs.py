@@ -5,11 +5,23 @@ Based on instructions from .fong/instructions/customs/instructions-pdf-batch-pro
 """
 
 from __future__ import annotations
+import functools
 import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import subprocess
 import re
 from pathlib import Path
-from typing import List, Tuple, Set
+from typing import Any, FrozenSet, Iterator, List, Optional, Tuple, Set
+
+try:
+    import pymupdf as fitz  # in-process text extraction, no pdftotext fork per PDF
+except ImportError:
+    fitz = None
+
+try:
+    import numpy as np  # vectorized duplicate scoring against all targets at once
+except ImportError:
+    np = None
 
 
 def _load_env_from_ragon_root() -> None:
@@ -40,23 +52,30 @@ SOURCE_DIR = Path(RAGON_ROOT) / "PDFs" if RAGON_ROOT else Path("PDFs")
 TARGET_DIR = Path(DKM_PDF_PATH) if DKM_PDF_PATH else Path("DKM-PDFs")
 SCANNED_DIR = Path(RAGON_ROOT) / "PDFs" / "scanned" if RAGON_ROOT else Path("PDFs/scanned")
 
-def normalize_filename(filename: str) -> Set[str]:
+# Tokens = runs of 3+ chars between separators (same as split on [-_\s.]+ and drop short ones)
+_TOKEN_RE = re.compile(r'[^-_\s.]{3,}')
+_HASH_TAIL_RE = re.compile(r'[-_][0-9a-f]{32}$', re.I)
+
+
+def list_pdf_names(directory: Path) -> List[str]:
+    """Sorted PDF filenames in directory (single scandir pass, any extension case)"""
+    try:
+        with os.scandir(directory) as it:
+            return sorted(e.name for e in it if e.name.lower().endswith('.pdf') and e.is_file())
+    except FileNotFoundError:
+        return []
+
+@functools.lru_cache(maxsize=4096)
+def normalize_filename(filename: str) -> FrozenSet[str]:
     """
     Normalize filename to token set for comparison
     Based on Jaccard + Token Set Ratio algorithm
     """
-    # Remove extension
-    name = filename.replace('.PDF', '').replace('.pdf', '')
+    # Remove extension, then MD5 hash suffix (-<32 hex>)
+    name = _HASH_TAIL_RE.sub('', filename.rsplit('.', 1)[0]).lower()
 
-    # Remove MD5 hash suffix (32 chars)
-    if len(name) > 32 and name[-32:].replace('-', '').replace('_', '').isalnum():
-        name = name[:-32].rstrip('-_')
-
-    # Split by separators
-    tokens = re.split(r'[-_\s.]+', name.lower())
-
-    # Filter short tokens and return set
-    return set(t for t in tokens if len(t) > 2)
+    # Split by separators, filter short tokens (frozenset: hashable for the cache)
+    return frozenset(_TOKEN_RE.findall(name))
 
 def calculate_similarity(tokens1: Set[str], tokens2: Set[str]) -> float:
     """Calculate Jaccard similarity + Token Set Ratio, return max"""
@@ -74,22 +93,76 @@ def calculate_similarity(tokens1: Set[str], tokens2: Set[str]) -> float:
 
     return max(jaccard, token_ratio)
 
-def find_similar_in_target(source_file: str, target_files: List[str], threshold: float = 0.7) -> List[Tuple[str, float]]:
-    """Find similar files in target directory"""
+def build_target_matrix(target_tokens_list: List[Tuple[str, FrozenSet[str]]]) -> Optional[Tuple[Any, ...]]:
+    """
+    Pack target token sets into bit rows over a shared vocabulary (None without numpy)
+    Returns (vocab, packed rows, set sizes, popcount table) for find_similar_in_target
+    """
+    if np is None or not target_tokens_list:
+        return None
+    vocab = {}
+    for _, tokens in target_tokens_list:
+        for tok in tokens:
+            vocab.setdefault(tok, len(vocab))
+    bits = np.zeros((len(target_tokens_list), max(len(vocab), 1)), dtype=bool)
+    for row, (_, tokens) in enumerate(target_tokens_list):
+        bits[row, [vocab[tok] for tok in tokens]] = True
+    sizes = np.fromiter((len(t) for _, t in target_tokens_list), dtype=np.float64, count=len(target_tokens_list))
+    popcount = np.array([bin(b).count('1') for b in range(256)], dtype=np.int64)
+    return vocab, np.packbits(bits, axis=1), sizes, popcount
+
+def find_similar_in_target(source_file: str, target_tokens_list: List[Tuple[str, FrozenSet[str]]], threshold: float = 0.7,
+                           target_matrix: Optional[Tuple[Any, ...]] = None) -> List[Tuple[str, float]]:
+    """Find similar files in target directory (targets pre-tokenized once by the caller)"""
     source_tokens = normalize_filename(source_file)
     matches = []
 
-    for target_file in target_files:
-        target_tokens = normalize_filename(target_file)
-        score = calculate_similarity(source_tokens, target_tokens)
-
-        if score >= threshold:
-            matches.append((target_file, score))
+    if target_matrix is not None:
+        # Same scores as calculate_similarity, for all targets in one pass:
+        # |A ∩ B| = popcount(A & B); tokens outside the vocabulary only count in |A|
+        if not source_tokens:
+            return matches
+        vocab, packed, sizes, popcount = target_matrix
+        row = np.zeros(packed.shape[1] * 8, dtype=bool)
+        row[[vocab[tok] for tok in source_tokens if tok in vocab]] = True
+        inter = popcount[packed & np.packbits(row)].sum(axis=1).astype(np.float64)
+        n = float(len(source_tokens))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            jaccard = inter / (n + sizes - inter)
+            token_ratio = inter / np.maximum(sizes, n)
+        scores = np.where(sizes > 0, np.maximum(jaccard, token_ratio), 0.0)
+        for i in np.nonzero(scores >= threshold)[0]:
+            matches.append((target_tokens_list[i][0], float(scores[i])))
+    else:
+        for target_file, target_tokens in target_tokens_list:
+            score = calculate_similarity(source_tokens, target_tokens)
+
+            if score >= threshold:
+                matches.append((target_file, score))
 
     # Sort by score descending
     matches.sort(key=lambda x: x[1], reverse=True)
     return matches
 
+def read_page_texts(pdf_path: Path, pages: List[int]) -> Iterator[Tuple[int, str]]:
+    """Yield (page, text) for the given 1-based pages, lazily (pages past the end are skipped)"""
+    if fitz is not None:
+        # Open once, extract only the sampled pages
+        with fitz.open(str(pdf_path)) as doc:
+            for page in pages:
+                if page <= doc.page_count:
+                    yield page, doc.load_page(page - 1).get_text()
+        return
+    for page in pages:
+        result = subprocess.run(
+            ['pdftotext', '-f', str(page), '-l', str(page), str(pdf_path), '-'],
+            capture_output=True,
+            text=True,
+            timeout=5
+        )
+        if result.returncode == 0:
+            yield page, result.stdout
+
 def check_text_layer(pdf_path: Path, pages_to_check: List[int] = [1, 5, 10, 20]) -> Tuple[bool, int]:
     """
     Check if PDF has text layer (native) or is scanned
@@ -98,29 +171,27 @@ def check_text_layer(pdf_path: Path, pages_to_check: List[int] = [1, 5, 10, 20])
     """
     max_chars = 0
 
-    for page in pages_to_check:
-        try:
-            result = subprocess.run(
-                ['pdftotext', '-f', str(page), '-l', str(page), str(pdf_path), '-'],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-
-            if result.returncode == 0:
-                char_count = len(result.stdout)
-                max_chars = max(max_chars, char_count)
-
-                # Early exit if we found significant text
-                if max_chars >= 100:
-                    return (True, max_chars)
-        except Exception as e:
-            print(f"  ⚠️  Error checking page {page}: {e}")
-            continue
+    try:
+        for page, text in read_page_texts(pdf_path, pages_to_check):
+            max_chars = max(max_chars, len(text))
+
+            # Early exit if we found significant text (usually page 1)
+            if max_chars >= 100:
+                return (True, max_chars)
+    except Exception as e:
+        print(f"  ⚠️  Error reading text: {e}")
 
     # Decision: < 100 chars = SCANNED
     return (max_chars >= 100, max_chars)
 
+def _classify_one(item: Tuple[str, Path]):
+    """check_text_layer for a pool worker: (name, result or Exception)"""
+    source_file, source_path = item
+    try:
+        return source_file, check_text_layer(source_path)
+    except Exception as e:
+        return source_file, e
+
 def main():
     print("🔍 PDF Classification & Duplicate Check")
     print("=" * 70)
@@ -129,10 +200,12 @@ def main():
     SCANNED_DIR.mkdir(exist_ok=True)
 
     # Get file lists
-    source_files = sorted([f.name for f in SOURCE_DIR.glob("*.PDF")] +
-                         [f.name for f in SOURCE_DIR.glob("*.pdf")])
-    target_files = sorted([f.name for f in TARGET_DIR.glob("*.PDF")] +
-                         [f.name for f in TARGET_DIR.glob("*.pdf")])
+    source_files = list_pdf_names(SOURCE_DIR)
+    target_files = list_pdf_names(TARGET_DIR)
+
+    # Tokenize targets once: N + M normalizations instead of N × M
+    target_tokens = [(f, normalize_filename(f)) for f in target_files]
+    target_matrix = build_target_matrix(target_tokens)
 
     print(f"\n📁 Source: {len(source_files)} PDFs in {SOURCE_DIR}")
     print(f"📁 Target: {len(target_files)} PDFs in {TARGET_DIR}")
@@ -145,8 +218,10 @@ def main():
         'duplicates': [],        # Already in DKM-PDFs
         'errors': []            # Errors during processing
     }
+    duplicates = {}
 
-    # Process each source file
+    # Process each source file: cheap checks first, text layer checks batched below
+    to_classify: List[Tuple[str, Path]] = []
     for idx, source_file in enumerate(source_files, 1):
         print(f"\n[{idx}/{len(source_files)}] {source_file}")
 
@@ -155,33 +230,51 @@ def main():
         # Skip if already has scanned- prefix
         if source_file.startswith('scanned-'):
             print(f"  📸 Already marked as scanned")
-            results['new_scanned'].append(source_file)
             continue
 
         # Check for duplicates in target
-        matches = find_similar_in_target(source_file, target_files, threshold=0.7)
+        matches = find_similar_in_target(source_file, target_tokens, threshold=0.7, target_matrix=target_matrix)
 
         if matches:
             print(f"  🔄 Found {len(matches)} similar file(s) in DKM-PDFs:")
             for match_file, score in matches[:3]:  # Show top 3
                 print(f"     - {match_file} (score: {score:.2f})")
-            results['duplicates'].append((source_file, matches))
+            duplicates[source_file] = matches
             continue
 
-        # Check text layer
-        print(f"  🔍 Checking text layer...")
-        try:
-            has_text, max_chars = check_text_layer(source_path)
-
-            if has_text:
-                print(f"  ✅ Native PDF (max chars: {max_chars}) → DKM-PDFs")
+        print(f"  🔍 Queued for text layer check")
+        to_classify.append((source_file, source_path))
+
+    # Check text layers in parallel. pdftotext runs are subprocess waits, so threads
+    # suffice; PyMuPDF is not thread-safe, so it gets worker processes instead.
+    classified = {}
+    if to_classify:
+        print(f"\n🔍 Checking text layer of {len(to_classify)} PDF(s)...")
+        pool_cls = ThreadPoolExecutor if fitz is None else ProcessPoolExecutor
+        with pool_cls(max_workers=min(8, os.cpu_count() or 1)) as ex:
+            for source_file, outcome in ex.map(_classify_one, to_classify):
+                classified[source_file] = outcome
+                if isinstance(outcome, Exception):
+                    print(f"  ❌ {source_file}: Error: {outcome}")
+                elif outcome[0]:
+                    print(f"  ✅ {source_file}: Native PDF (max chars: {outcome[1]}) → DKM-PDFs")
+                else:
+                    print(f"  📸 {source_file}: Scanned PDF (max chars: {outcome[1]}) → PDFs/scanned")
+
+    # Fill result buckets in source order
+    for source_file in source_files:
+        if source_file.startswith('scanned-'):
+            results['new_scanned'].append(source_file)
+        elif source_file in duplicates:
+            results['duplicates'].append((source_file, duplicates[source_file]))
+        else:
+            outcome = classified[source_file]
+            if isinstance(outcome, Exception):
+                results['errors'].append((source_file, str(outcome)))
+            elif outcome[0]:
                 results['new_native'].append(source_file)
             else:
-                print(f"  📸 Scanned PDF (max chars: {max_chars}) → PDFs/scanned")
                 results['new_scanned'].append(source_file)
-        except Exception as e:
-            print(f"  ❌ Error: {e}")
-            results['errors'].append((source_file, str(e)))
 
     # Print summary
     print("\n" + "=" * 70)
@@ -31,41 +31,36 @@ Recommendation:
 
 import os
 import re
+import sys
+import functools
 import argparse
 from pathlib import Path
-from rapidfuzz import fuzz, process
+import numpy as np
+from rapidfuzz import fuzz, process, utils
 
+_PREFIX_RE = re.compile(r'^(scanned-|text-scanned-|Unknown-)', re.IGNORECASE)
 
+
+@functools.lru_cache(maxsize=65536)
 def normalize_filename(filename):
     """
-    Normalize PDF filename for fuzzy matching.
+    Strip the parts of a PDF filename that are specific to this collection.
+
+    Lowercasing, punctuation and whitespace are left to RapidFuzz's
+    utils.default_process, which fuzzy_match_pdfs passes as processor.
 
     Example:
-        2024-Book-Title-Author-Publisher.PDF
-        -> "2024 book title author publisher"
+        scanned-2024-Book-Title-Author-Publisher.PDF
+        -> "2024-Book-Title-Author-Publisher"
 
     Args:
         filename: PDF filename (with or without extension)
 
     Returns:
-        Normalized string for comparison
+        Filename stem without special prefixes
     """
-    # Remove extension
-    name = Path(filename).stem
-
-    # Remove special prefixes
-    name = re.sub(r'^(scanned-|text-scanned-|Unknown-)', '', name, flags=re.IGNORECASE)
-
-    # Replace separators with spaces
-    name = name.replace('-', ' ').replace('_', ' ')
-
-    # Remove special characters, keep alphanumeric and spaces
-    name = re.sub(r'[^A-Za-z0-9\s]', '', name)
-
-    # Normalize whitespace and lowercase
-    name = ' '.join(name.split()).lower()
-
-    return name
+    # Remove extension, then special prefixes
+    return _PREFIX_RE.sub('', Path(filename).stem)
 
 
 def find_pdfs(folder_path):
@@ -75,19 +70,27 @@ def find_pdfs(folder_path):
     Args:
         folder_path: Path to folder
 
-    Returns:
-        List of PDF filenames (basename only)
+    Yields:
+        PDF filenames (basename only), in directory order; the same name may
+        appear more than once if it exists in several subfolders
     """
     folder = Path(folder_path)
     if not folder.exists():
         raise FileNotFoundError(f"Folder not found: {folder_path}")
 
-    pdfs = []
-    # Check both .PDF and .pdf extensions
-    for pattern in ['*.PDF', '*.pdf']:
-        pdfs.extend([f.name for f in folder.rglob(pattern)])
-
-    return sorted(set(pdfs))  # Remove duplicates and sort
+    # One scandir walk, extension checked case-insensitively
+    stack = [str(folder)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue  # unreadable subfolder: skip it, as rglob did
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.lower().endswith('.pdf'):
+                    yield entry.name
 
 
 def fuzzy_match_pdfs(source_files, dest_files, threshold=80):
@@ -111,25 +114,29 @@ def fuzzy_match_pdfs(source_files, dest_files, threshold=80):
     matched = []
     not_matched = []
 
-    for src_file in source_files:
-        src_norm = normalize_filename(src_file)
-
-        # Find best match in destination
-        if dest_choices:
-            # Use token_set_ratio for better matching (ignores word order)
-            results = process.extract(
-                src_norm,
-                dest_choices,
-                scorer=fuzz.token_set_ratio,
-                limit=1
-            )
-
-            if results and results[0][1] >= threshold:
-                best_match_norm, score, _ = results[0]
-                best_match_file = dest_normalized[best_match_norm]
-                matched.append((src_file, best_match_file, score))
-            else:
-                not_matched.append(src_file)
+    if not source_files or not dest_choices:
+        return matched, list(source_files)
+
+    # Score every source against every destination in one call
+    # (token_set_ratio ignores word order; scores below threshold come back as 0)
+    src_norms = [normalize_filename(f) for f in source_files]
+    scores = process.cdist(
+        src_norms,
+        dest_choices,
+        scorer=fuzz.token_set_ratio,
+        processor=utils.default_process,
+        score_cutoff=threshold,
+        dtype=np.float64,
+        workers=-1
+    )
+
+    # Best destination per source (first one on ties)
+    best_idx = scores.argmax(axis=1)
+    best_scores = scores[np.arange(len(src_norms)), best_idx]
+
+    for src_file, idx, score in zip(source_files, best_idx, best_scores):
+        if score >= threshold:
+            matched.append((src_file, dest_normalized[dest_choices[idx]], float(score)))
         else:
             not_matched.append(src_file)
 
@@ -137,14 +144,17 @@ def fuzzy_match_pdfs(source_files, dest_files, threshold=80):
 
 
 def print_report(matched, not_matched, source_folder, dest_folder):
-    """Print comparison report."""
-    print(f"\n{'='*80}")
-    print("PDF FUZZY MATCHING REPORT")
-    print(f"{'='*80}")
-    print(f"Source: {source_folder}")
-    print(f"Destination: {dest_folder}")
-    print(f"⚠️  This script ONLY reports. It does NOT copy/move any files.")
-    print(f"{'='*80}\n")
+    """Print comparison report (built in memory, written with a single write)."""
+    lines = []
+    emit = lines.append
+
+    emit(f"\n{'='*80}")
+    emit("PDF FUZZY MATCHING REPORT")
+    emit(f"{'='*80}")
+    emit(f"Source: {source_folder}")
+    emit(f"Destination: {dest_folder}")
+    emit(f"⚠️  This script ONLY reports. It does NOT copy/move any files.")
+    emit(f"{'='*80}\n")
 
     # Separate matched files into high confidence and manual review
     high_confidence = [(s, d, sc) for s, d, sc in matched if sc >= 90]
@@ -152,45 +162,47 @@ def print_report(matched, not_matched, source_folder, dest_folder):
 
     # High confidence matches
     if high_confidence:
-        print(f"✅ MATCHED FILES - HIGH CONFIDENCE ({len(high_confidence)}):")
-        print(f"{'-'*80}")
+        emit(f"✅ MATCHED FILES - HIGH CONFIDENCE ({len(high_confidence)}):")
+        emit(f"{'-'*80}")
         for src, dst, score in sorted(high_confidence, key=lambda x: -x[2]):
-            print(f"[{score:>3.0f}%] {src}")
-            print(f"       ↔ {dst}")
-            print()
+            emit(f"[{score:>3.0f}%] {src}")
+            emit(f"       ↔ {dst}")
+            emit('')
 
     # Manual review needed
     if manual_review:
-        print(f"\n⚠️  MANUAL REVIEW NEEDED - POTENTIAL FALSE POSITIVES ({len(manual_review)}):")
-        print(f"{'-'*80}")
-        print("These matches have score < 90%. Please verify manually:")
-        print()
+        emit(f"\n⚠️  MANUAL REVIEW NEEDED - POTENTIAL FALSE POSITIVES ({len(manual_review)}):")
+        emit(f"{'-'*80}")
+        emit("These matches have score < 90%. Please verify manually:")
+        emit('')
         for src, dst, score in sorted(manual_review, key=lambda x: -x[2]):
-            print(f"[{score:>3.0f}%] Score below 90% - verify if same book:")
-            print(f"  SOURCE: {src}")
-            print(f"  DEST:   {dst}")
-            print()
+            emit(f"[{score:>3.0f}%] Score below 90% - verify if same book:")
+            emit(f"  SOURCE: {src}")
+            emit(f"  DEST:   {dst}")
+            emit('')
 
     # Not matched files
     if not_matched:
-        print(f"\n❌ NOT MATCHED - RECOMMEND TO COPY ({len(not_matched)}):")
-        print(f"{'-'*80}")
+        emit(f"\n❌ NOT MATCHED - RECOMMEND TO COPY ({len(not_matched)}):")
+        emit(f"{'-'*80}")
         for src in sorted(not_matched):
-            print(f"  • {src}")
+            emit(f"  • {src}")
 
     # Summary
-    print(f"\n{'='*80}")
-    print(f"SUMMARY:")
-    print(f"  ✅ High confidence matches (≥90%): {len(high_confidence)}")
-    print(f"  ⚠️  Manual review needed (<90%): {len(manual_review)}")
-    print(f"  ❌ Not matched (recommend copy): {len(not_matched)}")
-    print(f"  📊 Total source files: {len(matched) + len(not_matched)}")
-    print(f"{'='*80}")
-    print(f"\n💡 RECOMMENDATION:")
-    print(f"  1. Review {len(manual_review)} manual review cases above")
-    print(f"  2. Copy {len(not_matched)} not-matched files to destination")
-    print(f"  3. Skip {len(high_confidence)} already-existing files")
-    print(f"{'='*80}\n")
+    emit(f"\n{'='*80}")
+    emit(f"SUMMARY:")
+    emit(f"  ✅ High confidence matches (≥90%): {len(high_confidence)}")
+    emit(f"  ⚠️  Manual review needed (<90%): {len(manual_review)}")
+    emit(f"  ❌ Not matched (recommend copy): {len(not_matched)}")
+    emit(f"  📊 Total source files: {len(matched) + len(not_matched)}")
+    emit(f"{'='*80}")
+    emit(f"\n💡 RECOMMENDATION:")
+    emit(f"  1. Review {len(manual_review)} manual review cases above")
+    emit(f"  2. Copy {len(not_matched)} not-matched files to destination")
+    emit(f"  3. Skip {len(high_confidence)} already-existing files")
+    emit(f"{'='*80}\n")
+
+    sys.stdout.write('\n'.join(lines) + '\n')
 
 
 def main():
@@ -224,8 +236,8 @@ def main():
 
     # Find PDFs in both folders
     print("Scanning folders...")
-    source_files = find_pdfs(args.source)
-    dest_files = find_pdfs(args.dest)
+    source_files = sorted(set(find_pdfs(args.source)))  # Remove duplicates and sort
+    dest_files = sorted(set(find_pdfs(args.dest)))
 
     print(f"Found {len(source_files)} PDFs in source folder")
     print(f"Found {len(dest_files)} PDFs in destination folder")
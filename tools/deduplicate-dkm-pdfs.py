@@ -22,16 +22,51 @@ Author: AI Assistant + Fong
 Date: 2025-11-20
 """
 
+import os
 import re
 import sys
+import bisect
 import hashlib
 import argparse
+import functools
 from pathlib import Path
 from collections import defaultdict
-from typing import Set, List, Tuple, Dict
-
-
-def normalize_filename(filename: str) -> Tuple[Set[str], List[str], str]:
+from typing import FrozenSet, Set, List, Tuple, Dict, Optional
+
+try:
+    import numpy as np  # vectorized pair scoring
+except ImportError:
+    np = None
+
+# Filename patterns, compiled once (normalize_filename runs for every file)
+_EXT_RE = re.compile(r'\.(pdf|PDF)$')
+_HASH_RE = re.compile(r'[-_][a-f0-9]{32}$')
+_PREFIX_RE = re.compile(r'^(text-scanned-|text-|scanned-|Unknown-)', re.IGNORECASE)
+_SPLIT_RE = re.compile(r'[-_\s.]+')
+_YEAR_RE = re.compile(r'^(\d{4})')
+_TEXT_PREFIX_RE = re.compile(r'^text-', re.IGNORECASE)
+
+# Volume/chapter/book identifiers, tried in this order (first pattern that matches wins)
+_VOLUME_RES = tuple(re.compile(p) for p in (
+    r'volume[_\s-]*(\d+)',
+    r'vol[_\s-]*(\d+)',
+    r'book[_\s-]*(\d+)',
+    r'chapter[_\s-]*(\d+)',
+    r'part[_\s-]*(\d+)',
+    r'edition[_\s-]*(\d+)'
+))
+
+# Token -> small int id, shared by all filenames (int sets hash and compare faster)
+_VOCAB: Dict[str, int] = {}
+
+
+def _intern(token: str) -> int:
+    token_id = _VOCAB.get(token)
+    return token_id if token_id is not None else _VOCAB.setdefault(token, len(_VOCAB))
+
+
+@functools.lru_cache(maxsize=65536)
+def normalize_filename(filename: str) -> Tuple[FrozenSet[int], Tuple[str, ...], str]:
     """
     Extract meaningful tokens from filename.
     
@@ -47,42 +82,34 @@ def normalize_filename(filename: str) -> Tuple[Set[str], List[str], str]:
         filename: Original filename
     
     Returns:
-        Tuple of (token_set, token_list, volume_identifier)
+        Tuple of (token_id_set, token_tuple, volume_identifier) - hashable, so results are cached.
+        The set holds interned token ids (see _intern), the tuple the token strings.
     """
     # Remove extension
-    name = re.sub(r'\.(pdf|PDF)$', '', filename)
+    name = _EXT_RE.sub('', filename)
     
     # Remove hash suffix (32 chars MD5)
-    name = re.sub(r'[-_][a-f0-9]{32}$', '', name)
+    name = _HASH_RE.sub('', name)
     
     # Remove common prefixes for comparison
-    name_for_comparison = re.sub(r'^(text-scanned-|text-|scanned-|Unknown-)', '', name, flags=re.IGNORECASE)
+    name_for_comparison = _PREFIX_RE.sub('', name).lower()
     
     # Extract volume/chapter/book identifiers (e.g., "Volume_2", "Book-5", "Chapter 3")
     # This helps identify different volumes/chapters of the same series
     volume_id = ""
-    volume_patterns = [
-        r'volume[_\s-]*(\d+)',
-        r'vol[_\s-]*(\d+)',
-        r'book[_\s-]*(\d+)',
-        r'chapter[_\s-]*(\d+)',
-        r'part[_\s-]*(\d+)',
-        r'edition[_\s-]*(\d+)'
-    ]
-    
-    for pattern in volume_patterns:
-        match = re.search(pattern, name_for_comparison.lower())
+    for pattern in _VOLUME_RES:
+        match = pattern.search(name_for_comparison)
         if match:
             volume_id = match.group(0)  # e.g., "volume_2"
             break
     
     # Split by separators
-    tokens = re.split(r'[-_\s.]+', name_for_comparison.lower())
+    tokens = _SPLIT_RE.split(name_for_comparison)
     
     # Remove empty and very short tokens
     tokens = [t for t in tokens if len(t) > 2]
     
-    return set(tokens), tokens, volume_id
+    return frozenset(_intern(t) for t in tokens), tuple(tokens), volume_id
 
 
 def jaccard_similarity(set1: Set[str], set2: Set[str]) -> float:
@@ -107,15 +134,107 @@ def token_set_ratio(set1: Set[str], set2: Set[str]) -> float:
     return len(common) / max_len if max_len > 0 else 0.0
 
 
+def pair_scores(token_sets: List[FrozenSet[int]], candidates: List[List[int]]) -> Optional[Tuple[list, list]]:
+    """
+    Jaccard and token set ratio for the candidate pairs of one year bucket.
+    
+    Token sets become bit rows over the bucket vocabulary; each pair's
+    intersection size is a popcount of the AND of two rows, done for all
+    pairs at once in numpy (no per-token set hashing).
+    
+    Returns:
+        (jaccard, token_score), each a list aligned with candidates: entry i
+        holds the scores of (i, j) for j in candidates[i]. None without numpy.
+    """
+    if np is None:
+        return None
+    
+    vocab = {}
+    for tokens in token_sets:
+        for t in tokens:
+            vocab.setdefault(t, len(vocab))
+    
+    bits = np.zeros((len(token_sets), max(len(vocab), 1)), dtype=bool)
+    for i, tokens in enumerate(token_sets):
+        bits[i, [vocab[t] for t in tokens]] = True
+    packed = np.packbits(bits, axis=1)
+    sizes = bits.sum(axis=1).astype(np.float64)
+    
+    counts = [len(c) for c in candidates]
+    left = np.repeat(np.arange(len(candidates)), counts)
+    right = np.fromiter((j for c in candidates for j in c), dtype=np.intp, count=sum(counts))
+    
+    popcount = np.array([bin(b).count('1') for b in range(256)], dtype=np.int64)
+    inter = popcount[packed[left] & packed[right]].sum(axis=1).astype(np.float64)
+    size1, size2 = sizes[left], sizes[right]
+    
+    # Same convention as jaccard_similarity / token_set_ratio: empty set -> 0.0
+    nonempty = (size1 > 0) & (size2 > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        jaccard = np.where(nonempty, inter / (size1 + size2 - inter), 0.0)
+        token_score = np.where(nonempty, inter / np.maximum(size1, size2), 0.0)
+    
+    offsets = np.cumsum(counts)[:-1]
+    return np.split(jaccard, offsets), np.split(token_score, offsets)
+
+
+def candidate_pairs(token_sets: List[FrozenSet[int]], threshold: float) -> List[List[int]]:
+    """
+    Block a year bucket: for each file i, the files j > i that can reach threshold.
+    
+    Score = max(jaccard, token_set_ratio) = |A ∩ B| / max(|A|, |B|) (Jaccard is never
+    larger), so a duplicate of A shares at least o_A = ceil(threshold * |A|) tokens.
+    With tokens ordered rarest-first, two such sets always share a token among their
+    first |A| - o_A + 1 tokens (prefix filtering) - blocking on those prefix tokens
+    drops no true duplicates. Since |A ∩ B| <= min(|A|, |B|), pairs whose sizes
+    differ too much (min / max < threshold) are dropped as well (length filter).
+    """
+    n = len(token_sets)
+    if threshold <= 0:
+        return [list(range(i + 1, n)) for i in range(n)]
+    
+    freq = defaultdict(int)
+    for tokens in token_sets:
+        for t in tokens:
+            freq[t] += 1
+    
+    blocks = defaultdict(list)  # prefix token -> files, in bucket order
+    prefixes = []
+    for i, tokens in enumerate(token_sets):
+        size = len(tokens)
+        # Smallest overlap o with o / size >= threshold (same float test as the score)
+        overlap = max(int(threshold * size) - 1, 0)
+        while overlap < size and overlap / size < threshold:
+            overlap += 1
+        prefix = sorted(tokens, key=lambda t: (freq[t], t))[:size - overlap + 1] if size else []
+        prefixes.append(prefix)
+        for t in prefix:
+            blocks[t].append(i)
+    
+    sizes = [len(tokens) for tokens in token_sets]
+    candidates = []
+    for i, prefix in enumerate(prefixes):
+        size1 = sizes[i]
+        others = set()
+        for t in prefix:
+            block = blocks[t]
+            # Blocks are in bucket order: only look at files after i
+            for j in block[bisect.bisect_right(block, i):]:
+                if min(size1, sizes[j]) / max(size1, sizes[j]) >= threshold:
+                    others.add(j)
+        candidates.append(sorted(others))
+    return candidates
+
+
 def extract_year(filename: str) -> int:
     """Extract year from filename (YYYY- prefix)"""
-    match = re.search(r'^(\d{4})', filename)
+    match = _YEAR_RE.match(filename)
     return int(match.group(1)) if match else 0
 
 
 def has_text_layer_prefix(filename: str) -> bool:
     """Check if filename has text- or Text- prefix (OCR'd PDF)"""
-    return bool(re.match(r'^text-', filename, re.IGNORECASE))
+    return bool(_TEXT_PREFIX_RE.match(filename))
 
 
 def is_scanned(filename: str) -> bool:
@@ -123,7 +242,7 @@ def is_scanned(filename: str) -> bool:
     return 'scanned' in filename.lower()
 
 
-def score_file_quality(filename: str) -> tuple:
+def score_file_quality(filename: str, year_of: Optional[Dict[str, int]] = None) -> tuple:
     """
     Score file quality for choosing best version.
     
@@ -133,10 +252,14 @@ def score_file_quality(filename: str) -> tuple:
     3. Not scanned (non-scanned is better)
     4. Shorter filename (simpler is better)
     
+    Args:
+        filename: PDF filename
+        year_of: Already-known years by filename (skips the regex when present)
+    
     Returns:
         Tuple for sorting: (year, has_text, not_scanned, -len)
     """
-    year = extract_year(filename)
+    year = year_of[filename] if year_of and filename in year_of else extract_year(filename)
     has_text = has_text_layer_prefix(filename)
     not_scanned = not is_scanned(filename)
     
@@ -154,20 +277,24 @@ def find_duplicates(pdf_dir: str, threshold: float = 0.85) -> List[Dict]:
     Returns:
         List of duplicate groups with scores
     """
-    pdf_path = Path(pdf_dir)
-    
-    # Find all PDF files
-    pdf_files = list(pdf_path.glob('*.pdf')) + list(pdf_path.glob('*.PDF'))
-    filenames = [f.name for f in pdf_files]
+    # Find all PDF files (single scandir pass, any extension case)
+    with os.scandir(pdf_dir) as it:
+        filenames = sorted(
+            e.name for e in it
+            if e.name.lower().endswith('.pdf') and e.is_file()
+        )
     
     print(f"📁 Scanning {len(filenames)} PDF files in {pdf_dir}")
     print(f"🎯 Similarity threshold: {threshold}\n")
     
-    # Group by year for faster comparison
+    # Normalize every file once (not once per pair inside the loops below)
+    norm = {fname: normalize_filename(fname) for fname in filenames}
+    year_of = {fname: extract_year(fname) for fname in filenames}
+    
+    # Group by year for faster comparison; within a year, only blocked candidate pairs are scored
     by_year = defaultdict(list)
     for fname in filenames:
-        year = extract_year(fname)
-        by_year[year].append(fname)
+        by_year[year_of[fname]].append(fname)
     
     # Find potential duplicates
     duplicates = []
@@ -175,25 +302,34 @@ def find_duplicates(pdf_dir: str, threshold: float = 0.85) -> List[Dict]:
     
     for year, files in by_year.items():
         if year and len(files) > 1:
+            token_sets = [norm[f][0] for f in files]
+            candidates = candidate_pairs(token_sets, threshold)
+            scores = pair_scores(token_sets, candidates)
+            
             for i, file1 in enumerate(files):
                 if file1 in checked:
                     continue
                 
-                tokens1_set, tokens1_list, volume1 = normalize_filename(file1)
+                tokens1_set, tokens1_list, volume1 = norm[file1]
                 
-                for file2 in files[i+1:]:
+                for k, j in enumerate(candidates[i]):
+                    file2 = files[j]
                     if file2 in checked:
                         continue
                     
-                    tokens2_set, tokens2_list, volume2 = normalize_filename(file2)
+                    tokens2_set, tokens2_list, volume2 = norm[file2]
                     
                     # If both have volume identifiers and they differ, NOT duplicates
                     if volume1 and volume2 and volume1 != volume2:
                         continue  # Skip - different volumes of same series
                     
                     # Calculate similarities
-                    jaccard = jaccard_similarity(tokens1_set, tokens2_set)
-                    token_score = token_set_ratio(tokens1_set, tokens2_set)
+                    if scores is not None:
+                        jaccard = float(scores[0][i][k])
+                        token_score = float(scores[1][i][k])
+                    else:
+                        jaccard = jaccard_similarity(tokens1_set, tokens2_set)
+                        token_score = token_set_ratio(tokens1_set, tokens2_set)
                     
                     # Combined score (max of both)
                     score = max(jaccard, token_score)
@@ -226,42 +362,46 @@ def group_duplicates(duplicates: List[Dict]) -> List[List[str]]:
     
     Example: If A~B and B~C, return [A, B, C] as one group
     """
-    # Build adjacency map
-    graph = defaultdict(set)
+    # Union-find over the pairs (iterative, no recursion limit)
+    parent = {}
+    
+    def find(x):
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        # Path compression
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+    
     for dup in duplicates:
         f1, f2 = dup['file1'], dup['file2']
-        graph[f1].add(f2)
-        graph[f2].add(f1)
+        parent.setdefault(f1, f1)
+        parent.setdefault(f2, f2)
+        r1, r2 = find(f1), find(f2)
+        if r1 != r2:
+            parent[r2] = r1
     
-    # Find connected components (groups)
-    visited = set()
-    groups = []
+    groups = defaultdict(list)
+    for f in parent:
+        groups[find(f)].append(f)
     
-    def dfs(node, group):
-        visited.add(node)
-        group.append(node)
-        for neighbor in graph[node]:
-            if neighbor not in visited:
-                dfs(neighbor, group)
-    
-    for node in graph:
-        if node not in visited:
-            group = []
-            dfs(node, group)
-            groups.append(group)
-    
-    return groups
+    return list(groups.values())
 
 
-def choose_best_file(files: List[str]) -> Tuple[str, List[str]]:
+def choose_best_file(files: List[str], quality: Dict[str, tuple]) -> Tuple[str, List[str]]:
     """
     Choose the best file from a duplicate group.
     
+    Args:
+        files: Files of one duplicate group
+        quality: Precomputed score_file_quality() per filename
+    
     Returns:
         (best_file, files_to_move)
     """
     # Sort by quality score (descending)
-    sorted_files = sorted(files, key=score_file_quality, reverse=True)
+    sorted_files = sorted(files, key=quality.__getitem__, reverse=True)
     
     best = sorted_files[0]
     to_move = sorted_files[1:]
@@ -269,54 +409,61 @@ def choose_best_file(files: List[str]) -> Tuple[str, List[str]]:
     return best, to_move
 
 
-def print_duplicate_report(duplicates: List[Dict], groups: List[List[str]]):
-    """Print duplicate detection report"""
-    print("=" * 100)
-    print("🔍 DUPLICATE DETECTION REPORT")
-    print(f"Found {len(duplicates)} duplicate pairs")
-    print(f"Grouped into {len(groups)} duplicate clusters")
-    print("=" * 100)
+def print_duplicate_report(duplicates: List[Dict], groups: List[List[str]], quality: Dict[str, tuple]):
+    """Print duplicate detection report (built in memory, written with a single write)"""
+    lines = []
+    emit = lines.append
+    
+    emit("=" * 100)
+    emit("🔍 DUPLICATE DETECTION REPORT")
+    emit(f"Found {len(duplicates)} duplicate pairs")
+    emit(f"Grouped into {len(groups)} duplicate clusters")
+    emit("=" * 100)
     
     if not groups:
-        print("\n✅ No duplicates found! Your DKM-PDFs is clean.\n")
+        emit("\n✅ No duplicates found! Your DKM-PDFs is clean.\n")
+        sys.stdout.write('\n'.join(lines) + '\n')
         return
     
-    print(f"\n📊 DUPLICATE GROUPS:\n")
+    emit(f"\n📊 DUPLICATE GROUPS:\n")
     
     total_to_move = 0
     
     for i, group in enumerate(groups, 1):
-        best, to_move = choose_best_file(group)
+        best, to_move = choose_best_file(group, quality)
         total_to_move += len(to_move)
         
-        print(f"{i}. Group of {len(group)} files:")
-        print(f"   ✅ KEEP:  {best}")
+        emit(f"{i}. Group of {len(group)} files:")
+        emit(f"   ✅ KEEP:  {best}")
         
         # Show quality score breakdown
-        year, has_text, not_scanned, neg_len = score_file_quality(best)
-        print(f"      └─ Score: year={year}, text_layer={has_text}, not_scanned={not_scanned}")
+        year, has_text, not_scanned, neg_len = quality[best]
+        emit(f"      └─ Score: year={year}, text_layer={has_text}, not_scanned={not_scanned}")
         
         for file in to_move:
-            year, has_text, not_scanned, neg_len = score_file_quality(file)
-            print(f"   ❌ MOVE:  {file}")
-            print(f"      └─ Score: year={year}, text_layer={has_text}, not_scanned={not_scanned}")
-        print()
+            year, has_text, not_scanned, neg_len = quality[file]
+            emit(f"   ❌ MOVE:  {file}")
+            emit(f"      └─ Score: year={year}, text_layer={has_text}, not_scanned={not_scanned}")
+        emit('')
+    
+    emit("=" * 100)
+    emit(f"\n📈 SUMMARY:")
+    emit(f"   Total duplicate groups: {len(groups)}")
+    emit(f"   Files to keep: {len(groups)}")
+    emit(f"   Files to move: {total_to_move}")
+    emit("=" * 100)
     
-    print("=" * 100)
-    print(f"\n📈 SUMMARY:")
-    print(f"   Total duplicate groups: {len(groups)}")
-    print(f"   Files to keep: {len(groups)}")
-    print(f"   Files to move: {total_to_move}")
-    print("=" * 100)
+    sys.stdout.write('\n'.join(lines) + '\n')
 
 
-def execute_deduplication(pdf_dir: str, groups: List[List[str]], dry_run: bool = True):
+def execute_deduplication(pdf_dir: str, groups: List[List[str]], quality: Dict[str, tuple], dry_run: bool = True):
     """
     Execute deduplication by moving duplicate files to backup folder.
     
     Args:
         pdf_dir: Directory containing PDFs
         groups: List of duplicate groups
+        quality: Precomputed score_file_quality() per filename
         dry_run: If True, only print what would be done
     """
     pdf_path = Path(pdf_dir)
@@ -342,9 +489,10 @@ def execute_deduplication(pdf_dir: str, groups: List[List[str]], dry_run: bool =
         print("\nMoving files:\n")
     
     moved_count = 0
+    would_move = 0
     
     for i, group in enumerate(groups, 1):
-        best, to_move = choose_best_file(group)
+        best, to_move = choose_best_file(group, quality)
         
         for file in to_move:
             src = pdf_path / file
@@ -352,6 +500,7 @@ def execute_deduplication(pdf_dir: str, groups: List[List[str]], dry_run: bool =
             
             if dry_run:
                 print(f"  [{i}] {file} → _backup_duplicates/")
+                would_move += 1
             else:
                 # Check if destination exists
                 if dst.exists():
@@ -363,7 +512,7 @@ def execute_deduplication(pdf_dir: str, groups: List[List[str]], dry_run: bool =
     
     print("\n" + "=" * 100)
     if dry_run:
-        print(f"🔍 DRY RUN COMPLETE - {len([f for g in groups for f in choose_best_file(g)[1]])} files would be moved")
+        print(f"🔍 DRY RUN COMPLETE - {would_move} files would be moved")
         print(f"\n💡 To execute, run with --execute flag")
     else:
         print(f"✅ DEDUPLICATION COMPLETE - {moved_count} files moved to backup")
@@ -423,11 +572,18 @@ Examples:
     # Group duplicates
     groups = group_duplicates(duplicates)
     
+    # Quality keys once per grouped file (reused by the report and the moves);
+    # years come from the pairs, which find_duplicates already grouped by year
+    year_of = {}
+    for dup in duplicates:
+        year_of[dup['file1']] = year_of[dup['file2']] = dup['year']
+    quality = {f: score_file_quality(f, year_of) for group in groups for f in group}
+    
     # Print report
-    print_duplicate_report(duplicates, groups)
+    print_duplicate_report(duplicates, groups, quality)
     
     # Execute deduplication
-    execute_deduplication(args.dir, groups, dry_run=not args.execute)
+    execute_deduplication(args.dir, groups, quality, dry_run=not args.execute)
 
 
 if __name__ == '__main__':
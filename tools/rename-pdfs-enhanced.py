@@ -6,22 +6,28 @@ Converts to year-first format: {year}-{title}-{author-optional}-{publisher-optio
 
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# Patterns compiled once: clean_component runs several times per filename
+# Everything except alphanumerics, dash, underscore and whitespace (quotes, ✅, ... included)
+_INVALID_CHARS_RE = re.compile(r'[^A-Za-z0-9\-_\s]')
+# Whitespace and dash runs collapse to a single dash
+_SEPARATORS_RE = re.compile(r'[\s-]+')
+_YEAR_RE = re.compile(r'((?:19|20)\d{2})')
+_AUTHOR_SPLIT_RE = re.compile(r'[,;]')
+_RENAMED_RE = re.compile(r'^(\d{4}|Unknown)-')
+_YEAR_FIRST_RE = re.compile(r'^\d{4}-')
+_PUBLISHER_RE = re.compile(r'Press|Publishing|OReilly|Packt|Manning|Wiley|Springer')
+
 def clean_component(text):
     """Remove ALL special chars, keep only alphanumeric, dash, underscore"""
-    text = text.replace('&', 'and')
-    text = text.replace("'", '').replace("'", '').replace("'", '')
-    text = text.replace('✅', '').strip()
-    text = re.sub(r'\s+', '-', text)
-    text = re.sub(r'[^A-Za-z0-9\-_]', '', text)
-    text = re.sub(r'-+', '-', text)
-    text = text.strip('-')
-    return text
+    text = _INVALID_CHARS_RE.sub('', text.replace('&', 'and'))
+    return _SEPARATORS_RE.sub('-', text).strip('-')
 
 def extract_year(text):
     """Extract 4-digit year from text within reasonable bounds"""
-    matches = re.findall(r'((?:19|20)\d{2})', text)
+    matches = _YEAR_RE.findall(text)
     for candidate in matches:
         year_int = int(candidate)
         if 1900 <= year_int <= 2025:
@@ -51,7 +57,7 @@ def parse_filename(filename):
 
         # Handle multiple authors
         if ',' in author or ';' in author:
-            authors = [a.strip() for a in re.split(r'[,;]', author)]
+            authors = [a.strip() for a in _AUTHOR_SPLIT_RE.split(author)]
             author = '_'.join([clean_component(a) for a in authors[:3]])
 
         return year, title, author, publisher
@@ -66,7 +72,7 @@ def parse_filename(filename):
         # Try to identify publisher (usually has "Press", "Publishing", etc.)
         publisher = ""
         for i in range(len(parts)-1, -1, -1):
-            if any(pub_word in parts[i] for pub_word in ['Press', 'Publishing', 'OReilly', 'Packt', 'Manning', 'Wiley', 'Springer']):
+            if _PUBLISHER_RE.search(parts[i]):
                 publisher = clean_component(parts[i].split('(')[0].split('-')[0])
                 break
 
@@ -86,7 +92,7 @@ def parse_filename(filename):
         return year, title, author, publisher
 
     # Pattern 3: Year at beginning (already renamed format)
-    year_match = re.match(r'^(\d{4}|Unknown)-', name_without_ext)
+    year_match = _RENAMED_RE.match(name_without_ext)
     if year_match:
         return None, None, None, None  # Skip already renamed
 
@@ -96,23 +102,24 @@ def parse_filename(filename):
 
     return year, title, "", ""
 
-def rename_pdf(old_path, dry_run=True):
-    """Rename PDF file to year-first format"""
+def plan_rename(old_path):
+    """
+    Work out the year-first name for one PDF without touching the disk.
+    Returns (new_name, None), or (None, skip message) if it should be left alone.
+    """
     old_name = old_path.name
 
     # Skip non-PDF files
     if not old_name.lower().endswith('.pdf'):
-        print(f"⏭️  Skip (not PDF): {old_name}")
-        return False
+        return None, f"⏭️  Skip (not PDF): {old_name}"
 
     # Skip already-correct year-first names, but allow Unknown-* to be reprocessed
-    if re.match(r'^\d{4}-', old_name):
-        print(f"⏭️  Skip (already renamed): {old_name}")
-        return False
+    if _YEAR_FIRST_RE.match(old_name):
+        return None, f"⏭️  Skip (already renamed): {old_name}"
 
     name_for_parsing = old_name
     unknown_prefixed = False
-    if re.match(r'^Unknown-', old_name):
+    if old_name.startswith('Unknown-'):
         unknown_prefixed = True
         name_for_parsing = old_name[len('Unknown-'):]
 
@@ -120,13 +127,11 @@ def rename_pdf(old_path, dry_run=True):
     year, title, author, publisher = parse_filename(name_for_parsing)
 
     if year is None or not title:
-        print(f"⏭️  Skip (already in correct format): {old_name}")
-        return False
+        return None, f"⏭️  Skip (already in correct format): {old_name}"
 
     # If we started with Unknown-* and still couldn't find a year, keep as-is
     if unknown_prefixed and year == "Unknown":
-        print(f"⏭️  Skip (still no year found): {old_name}")
-        return False
+        return None, f"⏭️  Skip (still no year found): {old_name}"
 
     # Build new filename
     components = [year, title]
@@ -141,6 +146,16 @@ def rename_pdf(old_path, dry_run=True):
     if len(new_name) > 255:
         new_name = new_name[:251] + '.PDF'
 
+    return new_name, None
+
+def rename_pdf(old_path, dry_run=True, plan=None):
+    """Rename PDF file to year-first format (plan: precomputed plan_rename result)"""
+    new_name, skip = plan if plan is not None else plan_rename(old_path)
+    if new_name is None:
+        print(skip)
+        return False
+
+    old_name = old_path.name
     new_path = old_path.parent / new_name
 
     # Check if target exists
@@ -197,8 +212,13 @@ def main():
     skipped = 0
     errors = 0
 
-    for pdf_file in pdf_files:
-        result = rename_pdf(pdf_file, dry_run)
+    # Parse names in parallel; renames stay sequential and in order, so the
+    # "target exists" check also sees files renamed earlier in this run
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as ex:
+        plans = list(ex.map(plan_rename, pdf_files))
+
+    for pdf_file, plan in zip(pdf_files, plans):
+        result = rename_pdf(pdf_file, dry_run, plan)
         if result:
             renamed += 1
         elif result is False:
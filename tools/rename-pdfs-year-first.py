@@ -4,22 +4,52 @@ Rename PDF files to year-first format:
 {year}-{title}-{author-optional}-{publisher-optional}.PDF
 """
 
+import functools
 import os
 import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+try:
+    import liburing  # optional: batch renameat() through io_uring (Linux)
+except ImportError:
+    liburing = None
+
+OUTPUT_BATCH = 256  # files per buffered stdout write in main()
+
+# Patterns compiled once (run for every PDF in the folder)
+_WHITESPACE_RE = re.compile(r'\s+')
+_INVALID_CHARS_RE = re.compile(r'[^A-Za-z0-9\-_]')
+_DASHES_RE = re.compile(r'-+')
+_YEAR_RE = re.compile(r'\b(19|20)\d{2}\b')
+
+# Apostrophe variants: ASCII, right and left curly quote
+_QUOTE_DEL = str.maketrans('', '', "'\u2019\u2018")
+
+# ASCII fast path for clean_component: whitespace -> '-', keep A-Z a-z 0-9 - _, drop the rest
+_ASCII_CLEAN = {
+    c: ('-' if chr(c).isspace() else None)
+    for c in range(128)
+    if not (chr(c).isalnum() or chr(c) in '-_')
+}
+
+@functools.lru_cache(maxsize=4096)  # authors/publishers repeat across a library
 def clean_component(text):
     """Remove ALL special chars, keep only alphanumeric, dash, underscore"""
-    # Replace & with 'and' before cleaning
-    text = text.replace('&', 'and')
-    # Replace apostrophe variants with empty string
-    text = text.replace("'", '').replace("'", '')  # ASCII and curly quote
-    # Replace all spaces with dash
-    text = re.sub(r'\s+', '-', text)
-    # Remove ALL special characters - keep only: A-Z, a-z, 0-9, -, _
-    text = re.sub(r'[^A-Za-z0-9\-_]', '', text)
+    # Replace & with 'and', drop apostrophe variants in the same pass
+    # (so "O\u2019Reilly" still takes the ASCII fast path below)
+    text = text.replace('&', 'and').translate(_QUOTE_DEL)
+    if text.isascii():
+        # Spaces -> dash and special chars removed in one table lookup pass
+        text = text.translate(_ASCII_CLEAN)
+    else:
+        # Replace all spaces with dash
+        text = _WHITESPACE_RE.sub('-', text)
+        # Remove ALL special characters - keep only: A-Z, a-z, 0-9, -, _
+        text = _INVALID_CHARS_RE.sub('', text)
     # Remove multiple consecutive dashes
-    text = re.sub(r'-+', '-', text)
+    text = _DASHES_RE.sub('-', text)
     # Strip leading/trailing dashes
     text = text.strip('-')
     return text
@@ -31,7 +61,7 @@ def parse_annas_archive_filename(filename):
 
     Returns: (year, title, author, publisher)
     """
-    parts = filename.split(' -- ')
+    parts = filename.split(' -- ', 4)  # only parts[0..3] are used
 
     if len(parts) < 3:
         return None, None, None, None
@@ -39,17 +69,13 @@ def parse_annas_archive_filename(filename):
     # Extract title
     title = clean_component(parts[0])
 
-    # Extract author
+    # Extract author (clean_component drops , and ;, so multiple authors run together)
     author = clean_component(parts[1]) if len(parts) > 1 else ""
-    # Multiple authors separated by comma or semicolon
-    if ',' in author or ';' in author:
-        authors = [a.strip() for a in re.split(r'[,;]', author)]
-        author = '_'.join([clean_component(a) for a in authors[:3]])  # Max 3 authors
 
     # Extract year from edition field (parts[2])
     year = "Unknown"
     if len(parts) > 2:
-        year_match = re.search(r'\b(19|20)\d{2}\b', parts[2])
+        year_match = _YEAR_RE.search(parts[2])
         if year_match:
             year = year_match.group(0)
 
@@ -61,21 +87,24 @@ def parse_annas_archive_filename(filename):
 
     return year, title, author, publisher
 
-def rename_pdf(old_path, dry_run=True):
-    """Rename PDF file to year-first format"""
-    old_name = old_path.name
+def plan_rename(old_name):
+    """
+    Work out the year-first name for one PDF (file name) without touching the disk.
+    Returns (new_name, None), or (None, message) if it should be skipped.
+    """
+    # Skip if already renamed ("YYYY-..." or "Unknown-..."); plain string checks, no regex
+    if (old_name[:4].isdecimal() and old_name[4:5] == '-') or old_name.startswith('Unknown-'):
+        return None, f"⏭️  Skip (already renamed): {old_name}"
 
-    # Skip if already renamed
-    if re.match(r'^\d{4}-', old_name) or re.match(r'^Unknown-', old_name):
-        print(f"⏭️  Skip (already renamed): {old_name}")
-        return False
+    # No ' -- ' separator: not Anna's Archive format, nothing to parse
+    if ' -- ' not in old_name:
+        return None, f"❌ Cannot parse: {old_name}"
 
     # Parse filename
     year, title, author, publisher = parse_annas_archive_filename(old_name)
 
     if not title:
-        print(f"❌ Cannot parse: {old_name}")
-        return False
+        return None, f"❌ Cannot parse: {old_name}"
 
     # Build new filename
     components = [year, title]
@@ -84,42 +113,108 @@ def rename_pdf(old_path, dry_run=True):
     if publisher:
         components.append(publisher)
 
-    new_name = '-'.join(components) + '.PDF'
-    new_path = old_path.parent / new_name
+    return '-'.join(components) + '.PDF', None
+
+def rename_pdf(dirpath, old_name, dry_run=True, batch=None, plan=None, out=None):
+    """
+    Rename PDF file old_name inside dirpath (str) to year-first format.
+    plan: precomputed plan_rename(old_name) result.
+    With batch (dict), an execute-mode rename is only queued as
+    batch[new_name] = old_name for rename_batch().
+    With out (list), report lines are appended to it instead of printed.
+    """
+    emit = sys.stdout.write if out is None else out.append
+
+    new_name, message = plan if plan is not None else plan_rename(old_name)
+    if new_name is None:
+        emit(f"{message}\n")
+        return False
+
+    # Paths are only built for files that actually get renamed
+    new_path = os.path.join(dirpath, new_name)
 
-    # Check if target exists
-    if new_path.exists():
-        print(f"⚠️  Target exists: {new_name}")
+    # Check if target exists (or is already taken by a queued rename)
+    if os.path.lexists(new_path) or (batch is not None and new_name in batch):
+        emit(f"⚠️  Target exists: {new_name}\n")
         return False
 
-    if dry_run:
-        print(f"🔍 Would rename:")
-        print(f"   Old: {old_name}")
-        print(f"   New: {new_name}")
+    if batch is not None and not dry_run:
+        batch[new_name] = old_name
+    elif dry_run:
+        emit(f"🔍 Would rename:\n   Old: {old_name}\n   New: {new_name}\n")
     else:
-        old_path.rename(new_path)
-        print(f"✅ Renamed:")
-        print(f"   Old: {old_name}")
-        print(f"   New: {new_name}")
+        os.rename(os.path.join(dirpath, old_name), new_path)
+        emit(f"✅ Renamed:\n   Old: {old_name}\n   New: {new_name}\n")
 
     return True
 
-def main():
-    import sys
+def rename_batch(folder, renames, batch_size=256):
+    """
+    Rename (old_name, new_name) pairs inside folder; returns one error (or None) per pair.
+    Uses io_uring (one submit per batch_size renames) when liburing is available on
+    Linux, otherwise plain os.rename. Targets must be distinct and not exist yet:
+    the queued renames run concurrently.
+    """
+    errors = [None] * len(renames)
+
+    if liburing is None or not sys.platform.startswith('linux'):
+        for i, (old_name, new_name) in enumerate(renames):
+            try:
+                os.rename(os.path.join(folder, old_name), os.path.join(folder, new_name))
+            except OSError as e:
+                errors[i] = e
+        return errors
+
+    ring = liburing.Ring()
+    liburing.io_uring_queue_init(batch_size, ring)
+    dfd = os.open(folder, os.O_DIRECTORY | os.O_RDONLY)
+    try:
+        cqe = liburing.Cqe()
+        for start in range(0, len(renames), batch_size):
+            chunk = renames[start:start + batch_size]
+            for i, (old_name, new_name) in enumerate(chunk, start):
+                sqe = liburing.io_uring_get_sqe(ring)
+                liburing.io_uring_prep_rename(sqe, old_name, new_name, 0, dfd, dfd)
+                liburing.io_uring_sqe_set_data64(sqe, i)
+            liburing.io_uring_submit_and_wait(ring, len(chunk))
+            for _ in chunk:
+                liburing.io_uring_wait_cqe(ring, cqe)
+                entry = cqe[0]
+                i = entry.user_data
+                try:
+                    entry.res  # raises OSError for a failed rename
+                except OSError as e:
+                    errors[i] = e
+                liburing.io_uring_cqe_seen(ring, entry)
+    finally:
+        os.close(dfd)
+        liburing.io_uring_queue_exit(ring)
+    return errors
 
+def main():
     if len(sys.argv) < 2:
-        print("Usage: python rename-pdfs-year-first.py <folder> [--execute]")
+        print("Usage: python rename-pdfs-year-first.py <folder> [--execute] [--io-uring]")
+        print("\n  --io-uring: with --execute, queue all renames and submit them in batches")
+        print("              through io_uring (needs the liburing package; falls back to os.rename)")
         sys.exit(1)
 
     folder = Path(sys.argv[1])
     dry_run = '--execute' not in sys.argv
+    batch = {} if '--io-uring' in sys.argv and not dry_run else None
 
     if not folder.is_dir():
         print(f"Error: {folder} is not a directory")
         sys.exit(1)
 
-    # Scan both .pdf and .PDF extensions (Linux is case-sensitive)
-    pdf_files = sorted(list(folder.glob('*.pdf')) + list(folder.glob('*.PDF')))
+    # Single scandir pass; extension matched case-insensitively (Linux is case-sensitive).
+    # Symlinks are skipped, and foo.pdf / Foo.PDF sort next to each other.
+    # DirEntry.name is already a str: no Path objects in the per-file loop
+    with os.scandir(folder) as it:
+        pdf_files = sorted(
+            (e.name for e in it
+             if e.is_file(follow_symlinks=False) and e.name.lower().endswith('.pdf')),
+            key=str.lower,
+        )
 
     if not pdf_files:
         print(f"No PDF files found in {folder}")
@@ -129,10 +224,33 @@ def main():
     print(f"Mode: {'DRY RUN (preview only)' if dry_run else 'EXECUTE (will rename)'}")
     print("-" * 80)
 
+    # Parse names in parallel; renames stay sequential and in order, so the
+    # "target exists" check also sees files renamed earlier in this run
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as ex:
+        plans = list(ex.map(plan_rename, pdf_files))
+
+    # Report lines are buffered and written once per OUTPUT_BATCH files
+    # instead of 2-3 print() calls (stdout lock + possible flush) per file
     renamed = 0
-    for pdf_file in pdf_files:
-        if rename_pdf(pdf_file, dry_run):
+    out = []
+    dirpath = str(folder)
+    for i, (pdf_name, plan) in enumerate(zip(pdf_files, plans), 1):
+        if rename_pdf(dirpath, pdf_name, dry_run, batch, plan, out):
             renamed += 1
+        if i % OUTPUT_BATCH == 0:
+            sys.stdout.writelines(out)
+            out.clear()
+
+    if batch:
+        queued = [(old_name, new_name) for new_name, old_name in batch.items()]
+        errors = rename_batch(dirpath, queued)
+        for (old_name, new_name), error in zip(queued, errors):
+            if error is not None:
+                out.append(f"❌ Error renaming {old_name}: {error}\n")
+                renamed -= 1
+                continue
+            out.append(f"✅ Renamed:\n   Old: {old_name}\n   New: {new_name}\n")
+    sys.stdout.writelines(out)
 
     print("-" * 80)
     print(f"Summary: {renamed}/{len(pdf_files)} files {'would be' if dry_run else 'were'} renamed")
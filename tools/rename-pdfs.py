@@ -1,70 +1,82 @@
 #!/usr/bin/env python3
 """Rename PDF files từ Anna's Archive format sang naming convention chuẩn"""
 
+import functools
 import os
 import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# Patterns compiled once (cleaned for every PDF in the folder)
+_SPECIAL_CHARS_RE = re.compile(r'[/:*?"<>|]')
+_UNDERSCORES_RE = re.compile(r'[_]+')
+_WHITESPACE_RE = re.compile(r'\s+')
+_DASHES_RE = re.compile(r'-+')
+_AUTHOR_JOIN_RE = re.compile(r'\s*(&|and|und)\s*')
+_COMMA_RE = re.compile(r',\s*')
+_MULTI_UNDERSCORE_RE = re.compile(r'_+')
+_YEAR_RE = re.compile(r'\b(19|20)\d{2}\b')
 
+
+@functools.lru_cache(maxsize=4096)
 def clean_title(title: str) -> str:
     """Clean và format title theo naming convention"""
     # Remove special chars
-    title = re.sub(r'[/:*?"<>|]', '', title)
+    title = _SPECIAL_CHARS_RE.sub('', title)
     # Replace underscores and multiple spaces with single space
-    title = re.sub(r'[_]+', ' ', title)
-    title = re.sub(r'\s+', ' ', title).strip()
+    title = _UNDERSCORES_RE.sub(' ', title)
+    title = _WHITESPACE_RE.sub(' ', title).strip()
     # Replace spaces with dash
     title = title.replace(' ', '-')
     # Remove multiple dashes
-    title = re.sub(r'-+', '-', title)
+    title = _DASHES_RE.sub('-', title)
     return title
 
 
+@functools.lru_cache(maxsize=4096)  # authors/publishers repeat across a library
 def clean_author(author: str) -> str:
     """Clean và format author theo naming convention"""
     # Remove trailing commas
     author = author.rstrip(', ')
     # Replace &, and, und with _
-    author = re.sub(r'\s*(&|and|und)\s*', '_', author)
+    author = _AUTHOR_JOIN_RE.sub('_', author)
     # Replace ; with _
     author = author.replace(';', '_')
     # Replace , with _ for multiple authors
-    author = re.sub(r',\s*', '_', author)
+    author = _COMMA_RE.sub('_', author)
     # Replace spaces with dash
     author = author.replace(' ', '-')
     # Remove multiple dashes/underscores
-    author = re.sub(r'-+', '-', author)
-    author = re.sub(r'_+', '_', author)
+    author = _DASHES_RE.sub('-', author)
+    author = _MULTI_UNDERSCORE_RE.sub('_', author)
     return author.strip('_-')
 
 
+@functools.lru_cache(maxsize=4096)
 def clean_publisher(publisher: str) -> str:
     """Clean và format publisher theo naming convention"""
     # Remove extra info after comma
     if ',' in publisher:
         publisher = publisher.split(',')[0]
     # Remove special chars
-    publisher = re.sub(r'[/:*?"<>|]', '', publisher)
+    publisher = _SPECIAL_CHARS_RE.sub('', publisher)
     # Replace spaces with dash
     publisher = publisher.replace(' ', '-')
     # Remove multiple dashes
-    publisher = re.sub(r'-+', '-', publisher)
+    publisher = _DASHES_RE.sub('-', publisher)
     return publisher.strip('-')
 
 
+@functools.lru_cache(maxsize=4096)
 def extract_year(edition_year: str) -> str:
     """Extract year from edition/year field"""
-    # Try to find 4-digit year
-    match = re.search(r'\b(19|20)\d{2}\b', edition_year)
+    # 4-digit year; also covers dates (YYYY-MM-DD): '-' is a word boundary,
+    # so a separate date pattern could never match where this one fails
+    match = _YEAR_RE.search(edition_year)
     if match:
         return match.group(0)
 
-    # If not found, try to extract from date format
-    match = re.search(r'\b(19|20)\d{2}-\d{2}-\d{2}\b', edition_year)
-    if match:
-        return match.group(0)[:4]
-
     return 'Unknown'
 
 
@@ -73,11 +85,11 @@ def parse_anna_archive_filename(filename: str) -> dict:
 
     Format: Title -- Author -- Edition/Year -- Publisher -- ISBN -- Hash -- Anna's Archive.pdf
     """
-    # Remove .pdf extension
-    name = filename.replace('.pdf', '')
+    # Remove .pdf extension (only the suffix, not ".pdf" inside the title)
+    name = filename[:-4] if filename.lower().endswith('.pdf') else filename
 
-    # Split by --
-    parts = [p.strip() for p in name.split(' -- ')]
+    # Split by -- (fields past the 4th are never used, so stop splitting there)
+    parts = [p.strip() for p in name.split(' -- ', 4)]
 
     result = {
         'title': 'Unknown',
@@ -112,6 +124,28 @@ def generate_new_filename(metadata: dict) -> str:
     return f"{title} - {author} - {publisher} - {year}.pdf"
 
 
+def plan_rename(old_name: str) -> tuple:
+    """Tính tên mới cho một file (không đụng tới disk)
+
+    Returns: (new_name, None), hoặc (None, skip message) nếu bỏ qua
+    """
+    # Skip if không có Anna's Archive pattern (chỉ một substring scan, không parse)
+    if ' -- ' not in old_name:
+        if '-' in old_name:
+            return None, f"⊘ Skip (already renamed): {old_name}"
+        return None, f"⊘ Skip (not Anna's Archive format): {old_name}"
+
+    # Parse metadata
+    metadata = parse_anna_archive_filename(old_name)
+    new_name = generate_new_filename(metadata)
+
+    # Check if new name is different
+    if old_name == new_name:
+        return None, f"⊘ Skip (same name): {old_name}"
+
+    return new_name, None
+
+
 def rename_pdfs_in_folder(folder_path: str, dry_run: bool = True):
     """Rename all PDF files in folder"""
     folder = Path(folder_path)
@@ -120,7 +154,9 @@ def rename_pdfs_in_folder(folder_path: str, dry_run: bool = True):
         print(f"Error: Folder không tồn tại: {folder_path}")
         return
 
-    pdf_files = list(folder.glob('*.pdf'))
+    # One scandir pass; DirEntry gives name and path without building Path objects
+    with os.scandir(folder) as it:
+        pdf_files = [e for e in it if e.name.endswith('.pdf') and e.is_file()]
 
     if not pdf_files:
         print(f"Không tìm thấy PDF files trong: {folder_path}")
@@ -128,33 +164,28 @@ def rename_pdfs_in_folder(folder_path: str, dry_run: bool = True):
 
     print(f"\nFound {len(pdf_files)} PDF files trong {folder_path}\n")
 
-    for pdf_file in pdf_files:
-        old_name = pdf_file.name
+    # Parse tên file song song; rename vẫn tuần tự theo thứ tự, để check
+    # "target exists" thấy cả các file vừa rename trước đó
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as ex:
+        plans = list(ex.map(plan_rename, [f.name for f in pdf_files]))
 
-        # Skip if already renamed (không có Anna's Archive pattern)
-        if ' -- ' not in old_name and '-' in old_name:
-            print(f"⊘ Skip (already renamed): {old_name}")
-            continue
-
-        # Parse metadata
-        metadata = parse_anna_archive_filename(old_name)
-        new_name = generate_new_filename(metadata)
+    for pdf_file, (new_name, skip) in zip(pdf_files, plans):
+        old_name = pdf_file.name
 
-        # Check if new name is different
-        if old_name == new_name:
-            print(f"⊘ Skip (same name): {old_name}")
+        if new_name is None:
+            print(skip)
             continue
 
         print(f"→ {old_name}")
         print(f"  {new_name}\n")
 
         if not dry_run:
-            new_path = pdf_file.parent / new_name
+            new_path = os.path.join(folder_path, new_name)
             # Check if target exists
-            if new_path.exists():
+            if os.path.lexists(new_path):
                 print(f"  ⚠ Warning: Target file already exists, skipping\n")
                 continue
-            pdf_file.rename(new_path)
+            os.rename(pdf_file.path, new_path)
             print(f"  ✓ Renamed\n")
 
 